@@ -2,7 +2,7 @@ import streamlit as st
 import folium
 from streamlit_folium import folium_static
 import geopandas as gpd
-from shapely.geometry import Polygon, LineString
+from shapely.geometry import LineString
 
 # functions below
 
@@ -11,10 +11,15 @@ def draw_from_file(filepath):
     m = folium.Map(location=[48.771, -94.90], zoom_start=4)
     st.map(gdf)
 
-    #for _, row in gdf.iterrows():
-        #polygon = row['geometry']
-        #coordinates = list(polygons.exterior.coords)
-        #folium.Polygon(locations=coordinates).add_to(m)
+    # All counties go onto the map as one GeoJson layer. Serializing the
+    # whole frame once is far cheaper than extracting coordinates and
+    # building a folium.Polygon per row, and Leaflet renders a single vector
+    # source instead of ~3k layer objects.
+    folium.GeoJson(
+        data=gdf.to_json(),
+        name='counties',
+        style_function=lambda _: {'weight': 0.25, 'fillOpacity': 0.1},
+    ).add_to(m)
 
     drawn_line = st.map.draw_polyline()
     if drawn_line is not None:
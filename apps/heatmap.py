@@ -1,19 +1,22 @@
-import streamlit as st
-import leafmap.foliumap as leafmap
-
-
-def app():
-
-    st.title("Heatmap")
-
-    filepath = "https://raw.githubusercontent.com/giswqs/leafmap/master/examples/data/us_cities.csv"
-    m = leafmap.Map(tiles="stamentoner")
-    m.add_heatmap(
-        filepath,
-        latitude="latitude",
-        longitude="longitude",
-        value="pop_max",
-        name="Heat map",
-        radius=20,
-    )
-    m.to_streamlit(height=700)
+import streamlit as st
+
+
+def app():
+    # Imported lazily: leafmap pulls in folium/branca and friends, which is
+    # a noticeable chunk of this page's cold-start time
+    import leafmap.foliumap as leafmap
+
+
+    st.title("Heatmap")
+
+    filepath = "https://raw.githubusercontent.com/giswqs/leafmap/master/examples/data/us_cities.csv"
+    m = leafmap.Map(tiles="stamentoner")
+    m.add_heatmap(
+        filepath,
+        latitude="latitude",
+        longitude="longitude",
+        value="pop_max",
+        name="Heat map",
+        radius=20,
+    )
+    m.to_streamlit(height=700)
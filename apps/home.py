@@ -1,19 +1,22 @@
-import streamlit as st
-import leafmap.foliumap as leafmap
-
-
-def app():
-    st.title("Home")
-
-    st.markdown(
-        """
-    A [streamlit](https://streamlit.io) app template for geospatial applications based on [streamlit-option-menu](https://github.com/victoryhb/streamlit-option-menu). 
-    To create a direct link to a pre-selected menu, add `?page=<app name>` to the URL, e.g., `?page=upload`.
-    https://share.streamlit.io/giswqs/streamlit-template?page=upload
-
-    """
-    )
-
-    m = leafmap.Map(locate_control=True)
-    m.add_basemap("ROADMAP")
-    m.to_streamlit(height=700)
+import streamlit as st
+
+
+def app():
+    # Imported lazily: leafmap pulls in folium/branca and friends, which is
+    # a noticeable chunk of this page's cold-start time
+    import leafmap.foliumap as leafmap
+
+    st.title("Home")
+
+    st.markdown(
+        """
+    A [streamlit](https://streamlit.io) app template for geospatial applications based on [streamlit-option-menu](https://github.com/victoryhb/streamlit-option-menu). 
+    To create a direct link to a pre-selected menu, add `?page=<app name>` to the URL, e.g., `?page=upload`.
+    https://share.streamlit.io/giswqs/streamlit-template?page=upload
+
+    """
+    )
+
+    m = leafmap.Map(locate_control=True)
+    m.add_basemap("ROADMAP")
+    m.to_streamlit(height=700)
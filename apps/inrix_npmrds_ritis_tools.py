@@ -1,1661 +1,2118 @@
-# -*- coding: utf-8 -*-
-"""
-Created on Mon Mar 15 13:13:08 2021
-
-@author: DIASF
-"""
-
-import os
-import re
-import zipfile
-import pandas as pd
-import numpy as np
-import geopandas as gpd
-import shapely
-
-def which_zip_is_which_data_source(input_data_folder):
-    '''
-    Function that searches the input data folder for zip files and determines 
-    which zipfiles contain the data needed for this task. The function also 
-    identifies the type of data/data source for each of those zipfiles. 
-    For example: 'texas_inrix_npmrds_15min(1).zip' contains the 'NPMRDS from 
-    INRIX (Passenger vehicles)' data.
-    
-    Parameters
-    ----------
-    input_data_folder : STR
-        String that indicates the folder to be investigated for the zipfiles 
-        containing the raw data
-
-    Returns
-    -------
-    data_paths_dict: DICT
-        Dictionary that contains information about where the files for each 
-        data source is located. It should be structured as follows:
-            {'data_origin_1':{'zip_file':'zip_file_1_full_path.zip',
-                              'raw_data_file':'raw_data_file_name_1.csv'},
-             'data_origin_2':{'zip_file':'zip_file_2_full_path.zip',
-                              'raw_data_file':'raw_data_file_name_2.csv'},
-             ...}
-    '''
-    
-    # Dictionary that is used to match data origin to the RegEx string
-    dict_for_origin_match = {
-        'inrix':
-            '.*INRIX TMC.*',
-        'npmrds_from_inrix_pass_vehicles':
-            '.*NPMRDS from INRIX \(Passenger vehicles\).*',
-        'npmrds_from_inrix_trucks':
-            '.*NPMRDS from INRIX \(Trucks\).*',
-        'npmrds_from_inrix_trucks_and_passveh':
-            '.*NPMRDS from INRIX \(Trucks and passenger vehicles\).*'}
-    
-    
-    # Find all zip files in input folder
-    folder_files = [f for f in os.listdir(input_data_folder) if 
-                    os.path.isfile(os.path.join(input_data_folder, f))]
-    
-    # Filter only zipfiles
-    folder_zips = list(filter(re.compile(".*zip$").match, folder_files))
-    
-    # Dictionary that will store the output
-    data_paths_dict = {}
-    
-    # Looping over zipfiles
-    for this_zip_file in folder_zips:
-        with zipfile.ZipFile(os.path.join(input_data_folder, 
-                                          this_zip_file)) as this_zip:
-            
-            # Checking if this is a data extract from RITIS' massive data downloader
-            files_in_zip = this_zip.namelist()
-            if 'Contents.txt' in files_in_zip:
-                
-                #Extracting the name of the raw data CSV file inside this zipfile
-                raw_data_file = [this_file for this_file in files_in_zip if 
-                                 this_file !='Contents.txt' and 
-                                 this_file !='TMC_Identification.csv'][0]
-                
-                # Performing a RegEx search to find which data source this 
-                # zipfile originally came from
-                with this_zip.open('Contents.txt','r') as content_file:
-                    this_content = content_file.readline().decode('utf-8')
-                    for this_data_origin, this_regex_string in (
-                            dict_for_origin_match.items()):
-                        regex_search = re.match(this_regex_string,this_content)
-                        if regex_search:
-                            data_paths_dict[this_data_origin] = {
-                                'zip_file':os.path.join(input_data_folder,
-                                                        this_zip_file),
-                                'raw_data_file':raw_data_file}
-    return data_paths_dict
-
-def read_csv_get_specific_road_segments(data_origin,
-                                        raw_data_zipfile,
-                                        raw_data_filename_in_zip,
-                                        road_str,chunk_size,
-                                        raw_data_chunks=None,
-                                        tmc_data_parts=None):
-    """
-    Function used to read in raw speed and TMC segment data. This function will 
-    likely be called multiple times because of the several different sources of 
-    input files. For example: INRIX, NPMRDS from INRIX, etc.
-    
-    INPUT VARIABLES:
-    ----------------
-    data_origin: STR 
-       String that characterizes the origin of the data. Sample values: 
-       'inrix','npmrds_from_inrix_trucks', 'npmrds_from_pass_vehicles'
-    raw_data_zipfile: STR
-        String that contains the file/folder location of the zipfile to be read
-    raw_data_filename_in_zip: STR
-        String that contains the filename of the raw data inside the zipfile
-    road_str: STR used to filter road segments based on their names. The TMC 
-        segments will be filtered based on whether or not the 'road' column 
-        contains this string. To get the entire dataset back, just use an 
-        empty string ('').
-    chunk_size: INT
-        Integer used to determine number of rows read at a time by Pandas' 
-        read_csv method.
-    raw_data_chunks: LIST 
-        List containing the several chunks of input files thus far.
-        The first time this function is called, this should just be an empty list.
-    tmc_data_parts: LIST 
-        List containing the several tmc_data inputs from the multiple times this 
-        function is called.
-                        
-    OUTPUT:
-    -------
-    output_dict : DICT
-        Dictionary that contains two values: 'raw_data_chunks' and 'tmc_data_parts':
-        raw_data_chunks: LIST 
-            List of pd.DataFrames that contain the several chunks of all the 
-            input  data-files, including the chunks created in the current 
-            execution of this method. 
-            Note: It is expected that these chunks will later be concatenated 
-            into one large DataFrame afterwards.
-        tmc_data_parts: LIST 
-            List of pd.DataFrames containing the analogous TMC data 
-            (i.e., the data in the "TMC_Identification.csv" files).
-    """ 
-    
-    if not raw_data_chunks:
-        raw_data_chunks = []
-    if not tmc_data_parts:
-        tmc_data_parts = []
-    
-    # Opening the zipfile
-    with zipfile.ZipFile(raw_data_zipfile) as this_zip:
-        
-        # Reading in the TMC data from the zipfile
-        with this_zip.open('TMC_Identification.csv','r') as tmc_data_file:
-            tmc_data = pd.read_csv(tmc_data_file, low_memory=False)
-    
-        # Adding extra column about data origin and storing the final result
-        tmc_data['data_origin'] = data_origin
-        tmc_data['road'] = tmc_data['road'].fillna('')
-        
-        # Fixing column names
-        tmc_data = tmc_data.rename({'tmc':'tmc_code',
-                                    'intersection':'intersection_',
-                                    'state':'state_',
-                                    'type':'type_'},axis=1)
-        
-        # Querying main searched road
-        tmc_data = tmc_data.query(f'road.str.contains("{road_str}")', 
-                                  engine='python')
-        
-        # Sometimes, this DataFrame has multiple rows for the same TMC. 
-        # This step is taken to de-duplicate the TMCs data.
-        tmc_data = (tmc_data
-                    .sort_values(by=['tmc_code','active_end_date'])
-                    .reset_index(drop=True))
-        tmc_data = tmc_data.groupby('tmc_code').last().reset_index()
-        tmc_data_parts.append(tmc_data.copy())
-        
-        # Subset of the TMC data with only the relevant columns
-        tmc_data_sub = tmc_data[['tmc_code','road','data_origin']]
-        
-        # Reading in the raw data in chunks and only keeping segments that 
-        # are related to the main searched road
-        with this_zip.open(raw_data_filename_in_zip,'r') as tmc_data_file:
-            with pd.read_csv(tmc_data_file, 
-                             chunksize=chunk_size, 
-                             dtype={'tmc_code':'str'}) as reader:
-                for raw_data in reader:
-                    raw_data = raw_data.merge(tmc_data_sub, 
-                                              how='left', on='tmc_code')
-                    raw_data = raw_data.loc[raw_data.road.notnull()]
-                    raw_data_chunks.append(raw_data.copy())
-    
-    # Since we need to return more than one output, the multiple outputs have 
-    # been added to a dictionary.
-    output_dict = {'raw_data_chunks':raw_data_chunks,
-                   'tmc_data_parts':tmc_data_parts}
-     
-    return output_dict
-
-def read_one_set_of_raw_data(input_data_folder,road_str,chunk_size,data_origin):
-    '''
-    Looks into the input folder and reads in the raw data contained in only 
-    one of the zipfiles.
-    
-    Parameters
-    ----------
-    input_data_folder : STR
-        String that indicates the folder to be investigated for the zipfiles 
-        containing the raw data
-    road_str: STR 
-        String used to filter road segments based on their names. This is also 
-        referred to as "the main searched road" in other places of this script.
-        The TMC segments will be filtered based on whether or not the 'road' 
-        column contains this string. To get the entire dataset back, just use 
-        an empty string ('').
-    chunk_size : INT
-        Integer that defines the chunk size for Pandas' `read_csv` method.
-    data_origin: STR 
-       String that characterizes the origin of the data. Sample values: 
-       'inrix','npmrds_from_inrix_trucks', 'npmrds_from_pass_vehicles'
-
-    Returns
-    -------
-    output_dict: DICT
-        Dictionary with two entries: "main_data" and "main_tmc_data".
-        main_data : pd.DataFrame
-            Pandas DataFrame that contains the actual raw speed data for the main 
-            searched road
-        main_tmc_data : pd.DataFrame
-            Pandas DataFrame that contains the associated TMC data for all the 
-            TMC segments on the main searched road
-
-    '''
-
-    # Searching the input folder for zipfiles and determining where the relevant
-    # raw data files are. This function also tells you which "data_origin" is 
-    # associated with each of the zipfiles.
-    data_paths_dict = which_zip_is_which_data_source(input_data_folder)
-    
-    
-    # This is an empty list that will store the DataFrame chunks from reading 
-    # in the raw speed data.
-    raw_data_chunks = []
-    
-    # This is an empty list that will store the DataFrames containing the TMC-
-    # segment  link data that is associated with each data source (i.e., the 
-    # data in the "TMC_Identification.csv" files)
-    tmc_data_parts = []
-    
-    
-    raw_data_zipfile = data_paths_dict[data_origin]['zip_file']
-    raw_data_filename_in_zip = data_paths_dict[data_origin]['raw_data_file']
-    results_dict = read_csv_get_specific_road_segments(
-                             data_origin=data_origin,
-                             raw_data_zipfile=raw_data_zipfile,
-                             raw_data_filename_in_zip=raw_data_filename_in_zip,
-                             road_str=road_str,
-                             chunk_size=chunk_size,
-                             raw_data_chunks=raw_data_chunks,
-                             tmc_data_parts=tmc_data_parts)
-    raw_data_chunks = results_dict['raw_data_chunks']
-    tmc_data_parts = results_dict['tmc_data_parts']
-    
-    # Concatenating all raw data chunks into one single DataFrame
-    main_data = pd.concat(raw_data_chunks, ignore_index=True).reset_index(drop=True)
-    
-    # Making sure there are no duplicates. If there are, they are averaged out.
-    #main_data = main_data.groupby(['data_origin','tmc_code','measurement_tstamp']).mean().reset_index()
-    main_data = main_data.drop_duplicates(subset=['data_origin','tmc_code','measurement_tstamp']).reset_index(drop=True)
-    
-    # Concatenating all TMC data parts into one single DataFrame
-    main_tmc_data = pd.concat(tmc_data_parts, ignore_index=True).reset_index(drop=True)
-    
-    # Since we need to return more than one output, the multiple outputs have 
-    # been added to a dictionary.
-    output_dict = {'main_data':main_data,
-                   'main_tmc_data':main_tmc_data}
-    
-    return output_dict
-
-
-def read_batch_of_raw_data(input_data_folder,road_str,chunk_size):
-    '''
-    Looks into the input folder and reads all of the zipfiles.
-    
-    Parameters
-    ----------
-    input_data_folder : STR
-        String that indicates the folder to be investigated for the zipfiles 
-        containing the raw data
-    road_str: STR 
-        String used to filter road segments based on their names. This is also 
-        referred to as "the main searched road" in other places of this script.
-        The TMC segments will be filtered based on whether or not the 'road' 
-        column contains this string. To get the entire dataset back, just use 
-        an empty string ('').
-    chunk_size : INT
-        Integer that defines the chunk size for Pandas' `read_csv` method.
-
-    Returns
-    -------
-    output_dict: DICT
-        Dictionary with two entries: "main_data" and "main_tmc_data".
-        main_data : pd.DataFrame
-            Pandas DataFrame that contains the actual raw speed data for the main 
-            searched road
-        main_tmc_data : pd.DataFrame
-            Pandas DataFrame that contains the associated TMC data for all the 
-            TMC segments on the main searched road            
-
-    '''
-    # Searching the input folder for zipfiles and determining where the relevant
-    # raw data files are. This function also tells you which "data_origin" is 
-    # associated with each of the zipfiles.
-    data_paths_dict = which_zip_is_which_data_source(input_data_folder)
-    
-    
-    # This is an empty list that will store the DataFrames containing the raw 
-    # speed data.
-    main_data_parts = []
-    
-    # This is an empty list that will store the DataFrames containing the TMC-
-    # segment link data that is associated with each data source (i.e., the 
-    # data in the "TMC_Identification.csv" files)
-    tmc_data_parts = []
-    
-    # Actually running the batch input process
-    for i,this_data_origin in enumerate(data_paths_dict):
-        this_batch_results = read_one_set_of_raw_data(input_data_folder,
-                                                      road_str,
-                                                      chunk_size,
-                                                      this_data_origin)
-        main_data_parts.append(this_batch_results['main_data'])
-        tmc_data_parts.append(this_batch_results['main_tmc_data'])
-    
-    # Concatenating all main data parts into one single DataFrame
-    main_data = pd.concat(main_data_parts, ignore_index=True).reset_index(drop=True)
-    
-    # Making sure there are no duplicates. If there are, they are averaged out.
-    #main_data = main_data.groupby(['data_origin','tmc_code','measurement_tstamp']).mean().reset_index()
-    main_data = main_data.drop_duplicates(subset=['data_origin','tmc_code','measurement_tstamp']).reset_index(drop=True)
-    
-    # Dropping observations/rows where there is no speed data. 
-    # This whole process is geared towards finding average (and percentiles) of
-    # speeds. If the data point provides us with no speed info, there is 
-    # nothing else we can use that data point for.
-    main_data = main_data.loc[main_data['speed'].notna()].reset_index(drop=True)
-    
-    # Concatenating all TMC data parts into one single DataFrame
-    main_tmc_data = pd.concat(tmc_data_parts, ignore_index=True).reset_index(drop=True)
-    
-    # Since we need to return more than one output, the multiple outputs have 
-    # been added to a dictionary.
-    output_dict = {'main_data':main_data,
-                   'main_tmc_data':main_tmc_data}
-    
-    return output_dict
-
-
-def fix_datetime_columns(main_data):
-    '''
-    Generates an actual datetime column in the "main_data" DataFrame by parsing 
-    the text-based timestamp column. Also extracts day-of-week and time info 
-    into separate columns.
-
-    Parameters
-    ----------
-    main_data : pd.DataFrame
-        The pandas DataFrame that contains all the raw data from the RITIS
-        website (INRIX/NPMRDS speeds)
-
-    Returns
-    -------
-    main_data : pd.DataFrame
-        The same DataFrame as the input, except that now, the DataFrame has a 
-        few new datetime-related columns. Namely:
-            -day_of_week: indicates the row's day of the week as a number from 
-                0 (Monday) to 6 (Sunday)
-            -day_of_week_str: indicates the row's day of the week as a string
-                of text
-            -time: indicates the row's TIME (without date)
-
-    '''
-    # Transforming STRING timestamp into an actual datetime format
-    main_data['measurement_tstamp'] = pd.to_datetime(main_data['measurement_tstamp'])
-    
-    # Extracting day-of-week data and making it more readable.
-    # Monday=0, Sunday=6
-    main_data['day_of_week'] = main_data.measurement_tstamp.dt.day_of_week
-    main_data['day_of_week_str'] = (main_data['day_of_week']
-                                    .apply(lambda x: {0:'0 - Monday',
-                                                      1:'1 - Tuesday',
-                                                      2:'2 - Wednesday',
-                                                      3:'3 - Thursday',
-                                                      4:'4 - Friday',
-                                                      5:'5 - Saturday',
-                                                      6:'6 - Sunday'}[x]))
-    
-    
-    # Extracting day-of-year data
-    main_data['day_of_year'] = main_data.measurement_tstamp.dt.day_of_year
-    
-    # Extracting the time value, which was coded originally in 15 minute intervals
-    main_data['time'] = main_data.measurement_tstamp.dt.time
-    
-    return main_data
-
-class time_slot():
-    '''
-    Class that is used to label the observations in the `main_data` DataFrame 
-    (that contains all the raw data from the RITIS speeds database) according 
-    to the time of day. For example: am_peak, pm_peak, etc.
-    ''' 
-    def __init__(self,time_start,time_end,include_start, include_end, 
-                 inside_outside,slot_name):
-        '''
-        Instantiates `time_slot`.
-        
-        Parameters
-        ----------
-        time_start : datetime.time
-            Start time of the time slot
-        time_end : datetime.time
-            End time of the time slot
-        include_start : BOOL
-            Indicates whether to use >= or just > for time_start
-        include_end : BOOL
-            Indicates whether to use <= or just < for time_end
-        inside_outside : STR
-            Indicates whether the time slot refers to the time inside or outside
-            of the start and end times. To be more specific:
-                If inside_outside=="inside", then the time slot refers to the 
-                time AFTER time_start but BEFORE time_end. 
-                If inside_outside=="outside" , then the time slot refers to the 
-                time BEFORE time_start but AFTER time_end (e.g.: before 6am and 
-                after 10pm). 
-        slot_name : STR
-            Describes the name of the time slot. Typical names include "am_peak",
-            "pm_peak", "off_peak".
-
-        Returns
-        -------
-        The newly-created instance of this class.
-
-        '''
-        self.time_start     = time_start
-        self.time_end       = time_end
-        self.include_start  = include_start
-        self.include_end    = include_end
-        self.inside_outside = inside_outside
-        self.slot_name      = slot_name
-        
-    
-    def get_filter(self, main_data):
-        '''
-        Gets the filter/mask that indicates which of the INRIX observations belong
-        to this specific time slot.
-        
-        Parameters
-        ----------
-        main_data : pd.DataFrame
-            The pandas DataFrame that contains all the raw data from the RITIS
-            website (INRIX/NPMRDS speeds)
-        
-        Returns
-        -------
-        ts_filter : pd.Series (bool)
-            An array of BOOL variables that indicates whether or not each 
-            observation belongs to this specific time slot. The array has length
-            equal to the number of rows in main_data.
-        '''
-        
-        try:
-            return self.ts_filter
-        except: 
-            if self.inside_outside == 'inside':
-                this_filter = ((self.time_start < main_data['time']) & 
-                               (main_data['time'] < self.time_end))
-            elif self.inside_outside == 'outside':
-                this_filter = ((main_data['time'] < self.time_start) | 
-                               (self.time_end < main_data['time']))
-            if self.include_start:
-                this_filter = (this_filter | 
-                               (main_data['time'] == self.time_start))
-            if self.include_end:
-                this_filter = (this_filter | 
-                               (main_data['time'] == self.time_end))
-            self.ts_filter = this_filter
-            return self.ts_filter
-        
-    def add_time_slot_data_to_main_data(self, main_data):
-        '''
-        Adds the 'time_slot' column to the data and applies `time_slot`'s name
-        to the appropriate rows.
-
-        Parameters
-        ----------
-        main_data : pd.DataFrame
-            The pandas DataFrame that contains all the raw data from the RITIS
-            website (INRIX/NPMRDS speeds)
-
-        Returns
-        -------
-        main_data : pd.DataFrame
-            The same DataFrame as was passed in the input. The only difference 
-            is that now, the `time_slot`'s name was applied to the rows that 
-            fall within the `time_slot`'s filter.
-
-        '''
-        try:
-            main_data.loc[self.get_filter,'time_slot'] = self.slot_name
-            return main_data
-        except:
-            main_data['time_slot'] = np.nan
-            main_data.loc[self.get_filter,'time_slot'] = self.slot_name
-            return main_data
-
-
-class day_of_year_window():
-    '''
-    Class that is used to label the observations in the `main_data` DataFrame 
-    (that contains all the raw data from the RITIS speeds database) according 
-    to the day of the year. For example: some analyses require only data between 
-    September and October.
-    ''' 
-    def __init__(self,start_date,end_date,include_start, include_end, 
-                 inside_outside,window_name):
-        '''
-        Instantiates `day_of_year_window`.
-        
-        Parameters
-        ----------
-        start_date : INT
-            Integer that indicates the day_of_year for the window's start date
-        end_date : INT
-            Integer that indicates the day_of_year for the window's end date
-        include_start : BOOL
-            Indicates whether to use >= or just > for start_date
-        include_end : BOOL
-            Indicates whether to use <= or just < for end_date
-        inside_outside : STR
-            Indicates whether the window refers to the days inside or outside
-            of the start and end dates. To be more specific:
-                If inside_outside=="inside", then the window refers to the 
-                time AFTER start_date but BEFORE end_date. 
-                If inside_outside=="outside" , then the time slot refers to the 
-                time BEFORE start_date but AFTER end_date (e.g.: Before January
-                25th and after November 12th). 
-        window_name : STR
-            Describes the name of the window.
-
-        Returns
-        -------
-        The newly-created instance of this class.
-
-        '''
-        self.start_date     = start_date
-        self.end_date       = end_date
-        self.include_start  = include_start
-        self.include_end    = include_end
-        self.inside_outside = inside_outside
-        self.window_name    = window_name
-        
-    
-    def get_filter(self, main_data):
-        '''
-        Gets the filter/mask that indicates which of the INRIX observations belong
-        to this specific date window.
-        
-        Parameters
-        ----------
-        main_data : pd.DataFrame
-            The pandas DataFrame that contains all the raw data from the RITIS
-            website (INRIX/NPMRDS speeds)
-        
-        Returns
-        -------
-        doy_filter : pd.Series (bool)
-            An array of BOOL variables that indicates whether or not each 
-            observation belongs to this specific window. The array has length
-            equal to the number of rows in main_data.
-        '''
-        
-        try:
-            return self.doy_filter
-        except: 
-            if self.inside_outside == 'inside':
-                this_filter = ((self.start_date < main_data['day_of_year']) &
-                               (main_data['day_of_year'] < self.end_date))
-            elif self.inside_outside == 'outside':
-                this_filter = ((main_data['day_of_year'] < self.start_date) | 
-                               (self.end_date < main_data['day_of_year']))
-            if self.include_start:
-                this_filter = (this_filter | 
-                               (main_data['day_of_year'] == self.start_date))
-            if self.include_end:
-                this_filter = (this_filter | 
-                               (main_data['day_of_year'] == self.end_date))
-            self.doy_filter = this_filter
-            return self.doy_filter
-        
-    def add_window_data_to_main_data(self, main_data):
-        '''
-        Adds the 'date_window' column to the data and applies the 
-        `day_of_year_window`'s name to the appropriate rows.
-
-        Parameters
-        ----------
-        main_data : pd.DataFrame
-            The pandas DataFrame that contains all the raw data from the RITIS
-            website (INRIX/NPMRDS speeds)
-
-        Returns
-        -------
-        main_data : pd.DataFrame
-            The same DataFrame as was passed in the input. The only difference 
-            is that now, the `day_of_year_window`'s name was applied to the rows 
-            that fall within the `day_of_year_window`'s filter.
-
-        '''
-        try:
-            main_data.loc[self.get_filter,'date_window'] = self.window_name
-            return main_data
-        except:
-            main_data['date_window'] = np.nan
-            main_data.loc[self.get_filter,'date_window'] = self.window_name
-            return main_data
-
-
-
-# Function used to calculate summaries for grouped data
-def calc_summaries(grouped_data):
-    '''
-    Calculates all the important summaries for means and percentiles.
-
-    Parameters
-    ----------
-    grouped_data : DataFrameGroupBy object
-        DataFrame that was filtered down and grouped using the `groupby` function.
-
-    Returns
-    -------
-    grouped_data_summaries : pd.DataFrame
-        Pandas DataFrame containing all of the summary results: means and 
-        percentiles for speed and travel time.
-
-    '''
-    # Determining which column name to use: minutes or seconds
-    if 'travel_time_minutes' in grouped_data.head().columns:
-        tt_col = 'travel_time_minutes'
-    else:
-        tt_col = 'travel_time_seconds'
-    
-    grouped_data_summaries = grouped_data.agg(
-        count_obs = pd.NamedAgg(column='measurement_tstamp', aggfunc='count'),
-                                                
-        speed_avg = pd.NamedAgg(column='speed', aggfunc=('mean')),
-        speed_01p = pd.NamedAgg(column='speed', aggfunc=(lambda x: np.percentile(x, q =  1))),
-        speed_05p = pd.NamedAgg(column='speed', aggfunc=(lambda x: np.percentile(x, q =  5))),
-        speed_15p = pd.NamedAgg(column='speed', aggfunc=(lambda x: np.percentile(x, q = 15))),
-        speed_20p = pd.NamedAgg(column='speed', aggfunc=(lambda x: np.percentile(x, q = 20))),
-        speed_50p = pd.NamedAgg(column='speed', aggfunc=(lambda x: np.percentile(x, q = 50))),
-        speed_80p = pd.NamedAgg(column='speed', aggfunc=(lambda x: np.percentile(x, q = 80))),
-        speed_85p = pd.NamedAgg(column='speed', aggfunc=(lambda x: np.percentile(x, q = 85))),
-        speed_95p = pd.NamedAgg(column='speed', aggfunc=(lambda x: np.percentile(x, q = 95))),
-        speed_99p = pd.NamedAgg(column='speed', aggfunc=(lambda x: np.percentile(x, q = 99))),
-        
-        ttime_avg = pd.NamedAgg(column=tt_col, aggfunc=('mean')),
-        ttime_01p = pd.NamedAgg(column=tt_col, aggfunc=(lambda x: np.percentile(x, q =  1))),
-        ttime_05p = pd.NamedAgg(column=tt_col, aggfunc=(lambda x: np.percentile(x, q =  5))),
-        ttime_15p = pd.NamedAgg(column=tt_col, aggfunc=(lambda x: np.percentile(x, q = 15))),
-        ttime_20p = pd.NamedAgg(column=tt_col, aggfunc=(lambda x: np.percentile(x, q = 20))),
-        ttime_50p = pd.NamedAgg(column=tt_col, aggfunc=(lambda x: np.percentile(x, q = 50))),
-        ttime_80p = pd.NamedAgg(column=tt_col, aggfunc=(lambda x: np.percentile(x, q = 80))),
-        ttime_85p = pd.NamedAgg(column=tt_col, aggfunc=(lambda x: np.percentile(x, q = 85))),
-        ttime_95p = pd.NamedAgg(column=tt_col, aggfunc=(lambda x: np.percentile(x, q = 95))),
-        ttime_99p = pd.NamedAgg(column=tt_col, aggfunc=(lambda x: np.percentile(x, q = 99))),
-        
-        )
-    return grouped_data_summaries
-
-
-def calc_summaries_pipeline(main_data,
-                            summary_name,
-                            summary_filter,
-                            grouping_columns):
-    '''
-    This function simplifies and standardizes the process of calculating 
-    summaries from the raw data. The user needs to tell the function what
-    rows are to be kept, what columns will be used to group the data and the 
-    name of this particular summary.
-    This function then returns the newly-calculated summarized data containing
-    a new column called "summary_type".
-
-    Parameters
-    ----------
-    main_data : pd.DataFrame
-        The pandas DataFrame that contains all the raw data from the RITIS
-        website (INRIX/NPMRDS speeds).
-    summary_name : str
-        String that describes this summary type. After the `main_data` is 
-        summarized, a new column called "summary_type" will be generated. 
-        This new column will contain the text stored in the `summary_name`
-        variable.
-    summary_filter : np.array
-        Array containing only boolean values (False/True). This indicates which
-        rows from the `main_data` should be used in the calculation of these 
-        summaries.
-    grouping_columns : list
-        List of column names that will be used to group the `main_data`
-        dataset
-
-    Returns
-    -------
-    summarized_data : pd.DataFrame
-        Pandas DataFrame containing all of the summary results: means and 
-        percentiles for speed and travel time.
-
-    '''
-    grouped_data = main_data.loc[summary_filter].groupby(grouping_columns)
-    
-    summarized_data = calc_summaries(grouped_data)
-    
-    summarized_data['summary_type'] = summary_name
-    
-    return summarized_data
-
-
-
-
-def read_npmrds_geodata(npmrds_geodata_path):
-    '''
-    Reads in the shapefile associated with the NPMRDS data. Typically, this 
-    file is just called "Texas.shp"
-
-    Parameters
-    ----------
-    npmrds_geodata_path : STR
-        String describing the full path to the ".shp" file on disk of where the 
-        NPMRDS data can be found. 
-
-    Returns
-    -------
-    npmrds_geodata : gpd.GeoDataFrame
-        The GeoDataFrame with the actual geodata from the NPMRDS shapefile.
-    '''
-    
-    npmrds_geodata = gpd.read_file(npmrds_geodata_path).rename({'Tmc':'tmc_code'},
-                                                               axis=1)
-    
-    return npmrds_geodata
-
-
-
-
-def make_link(df_row):
-    '''
-    Function that creates a simplified link geometry (straight line) using the 
-    start/end long/lat data from the original INRIX main data.
-
-    Parameters
-    ----------
-    df_row : pd.Series
-        One row of the `main_data_summaries` DataFrame
-
-    Returns
-    -------
-    row_line : shapely.LineString
-        Geometric feature created using the lat/lon data from in the input row
-
-    '''
-    start_pt = shapely.geometry.Point([df_row['start_longitude'], 
-                                       df_row['start_latitude']])
-    end_pt = shapely.geometry.Point([df_row['end_longitude'], 
-                                     df_row['end_latitude']])
-    row_line = shapely.geometry.LineString([start_pt,end_pt])
-    return row_line
-
-def add_geometries_to_summaries(summarized_data, 
-                                main_tmc_data,
-                                npmrds_geodata_path):
-    '''
-    Adds a column called "geom_final" to the dataset. This new column contains 
-    a geometry for each row in the summary dataset. This geometry is generated 
-    in one of two different ways, in the following priority:
-        -Look in the NPMRDS shapefile to try and find a link with matching TMC
-        -If we can't find one, we just draw a straight line from the lat/lon
-            data that is found in the TMC_Identification.csv files.
-    
-    Parameters
-    ----------
-    summarized_data : pd.DataFrame
-        Pandas DataFrame that contains the speed summaries. 
-    main_tmc_data : pd.DataFrame
-        Pandas DataFrame that contains the associated TMC data for all the 
-        TMC segments (i.e., the data from all the "TMC_Identification.csv" files)
-    npmrds_geodata_path : STR
-        String that identifies where to find the NPMRDS shapefile. Needs to 
-        point to the ".shp" file. Typically, this file is just called "Texas.shp"
-        
-    Returns
-    -------
-    summarized_data_with_geoms : gpd.GeoDataFrame
-        GeoDataFrame containing the geometries associated with each link.
-    
-    '''
-    
-    npmrds_geodata = gpd.read_file(npmrds_geodata_path).rename({'Tmc':'tmc_code'},
-                                                               axis=1)
-    
-    # Merging summaries with NPMRDS geometries
-    summarized_data_with_geoms = summarized_data.merge(
-        npmrds_geodata[['tmc_code','geometry']].to_crs('epsg:4326'), 
-        how='left', 
-        on='tmc_code')
-    
-    # Applying the "make_link" function to generate the simplified geometries
-    temp_geoms = (summarized_data_with_geoms
-                  .drop_duplicates(subset=['data_origin','tmc_code'])
-                  .sort_values(by=['data_origin','tmc_code'])
-                  .reset_index(drop=True))
-    
-    temp_geoms = temp_geoms.merge(main_tmc_data[['tmc_code',
-                                                 'data_origin',
-                                                 'start_latitude',
-                                                 'start_longitude',
-                                                 'end_latitude',
-                                                 'end_longitude']], 
-                                  how='left', 
-                                  on=['data_origin','tmc_code'])
-    
-    temp_geoms['geometry_simplified'] = temp_geoms.apply(make_link, axis=1)
-
-    summarized_data_with_geoms = summarized_data_with_geoms.merge(
-        temp_geoms[['data_origin','tmc_code','geometry_simplified']], 
-        how='left', on=['data_origin','tmc_code'])
-    
-    
-    # Filter that indicates which observations/rows did not have an 
-    # associated geometry in the NPMRDS geodata.
-    null_geoms_filter = summarized_data_with_geoms['geometry'].isnull()
-    
-    # Populating the `geom_final` column with either the geometry found in the NPMRDS
-    # geodata (preferred), or with the simplified geometry created above (fallback).
-    summarized_data_with_geoms['geom_final'] = summarized_data_with_geoms['geometry']
-    summarized_data_with_geoms.loc[null_geoms_filter,'geom_final'] = (
-        summarized_data_with_geoms.loc[null_geoms_filter,'geometry_simplified'])
-    
-    # Populating the `geom_final_type` column with a flag that shows what type of 
-    # geometry is in the `geom_final` column. 
-    # If `geom_final_type`== 'original_tmc_shape', then the geometry in 
-    # `geom_final` represents the original NPMRDS geometry. 
-    # If `geom_final_type`== 'simplified_tmc_shape', then the geometry in 
-    # `geom_final` represents the simplified geometry we created in this script
-    # just a few lines above. 
-    summarized_data_with_geoms['geom_final_type'] = 'original_tmc_shape'
-    summarized_data_with_geoms.loc[null_geoms_filter,
-                                   'geom_final_type'] = 'simplified_tmc_shape'
-    
-    summarized_data_with_geoms = gpd.GeoDataFrame(
-        summarized_data_with_geoms.drop(['geometry','geometry_simplified']
-                                        ,axis=1),
-        crs='epsg:4326',geometry='geom_final')
-    
-    # Extracting the WKT data. Useful for exporting to CSV. 
-    summarized_data_with_geoms['geom_wkt'] = gpd.array.to_wkt(
-        summarized_data_with_geoms.geom_final.values)
-    
-    # Exporting final data to disk
-    #summarized_data_with_geoms.to_file(main_data_geoms_filename,driver='GPKG',layer='main')    
-
-    return summarized_data_with_geoms
-    
-def define_standard_fhwa_timeslots(main_data):
-    '''
-    Adds timeslot and date window columns to `main_data`. These are the 
-    standard timeslots used for the FHWA reliability computations:
-        -AM Peak:   Between 06am and 10am
-        -Mid-day:   Between 10am and 04pm
-        -PM Peak:   Between 04pm and 08pm
-        -Overnight: Between 08pm and 06am
-    
-    Parameters
-    ----------
-    main_data : pd.DataFrame
-        Input DataFrame containing raw speed data for all links.
-
-    Returns
-    -------
-    main_data : pd.DataFrame
-        DataFrame containing raw speed data for all links. 
-        After this function is executed, the following columns get added:
-            -"time_slot"
-            -"date_window"
-
-    '''
-    
-    # Creating the thresholds for the definitions of peak and off-peak time slots
-    # and finding the observations that fall in each category/time slot.
-    # Time slots used are:
-    #    -AM Peak:   Between 06am and 10am
-    #    -Mid-day:   Between 10am and 04pm
-    #    -PM Peak:   Between 04pm and 08pm
-    #    -Overnight: Between 08pm and 06am
-    
-    am_peak = time_slot(time_start = pd.to_datetime('06:00 AM').time(),
-                        time_end = pd.to_datetime('10:00 AM').time(),
-                        include_start = True, 
-                        include_end = False,
-                        inside_outside = 'inside',
-                        slot_name = 'am_peak')
-    
-    afternoon_offpeak = time_slot(time_start = pd.to_datetime('10:00 AM').time(),
-                                  time_end = pd.to_datetime('04:00 PM').time(),
-                                  include_start = True, 
-                                  include_end = False,
-                                  inside_outside = 'inside',
-                                  slot_name = 'midday')
-    
-    pm_peak = time_slot(time_start = pd.to_datetime('04:00 PM').time(),
-                        time_end = pd.to_datetime('08:00 PM').time(),
-                        include_start = True, 
-                        include_end = False,
-                        inside_outside = 'inside',
-                        slot_name = 'pm_peak')
-    
-    night = time_slot(time_start = pd.to_datetime('06:00 AM').time(),
-                      time_end = pd.to_datetime('08:00 PM').time(),
-                      include_start = False, 
-                      include_end = True,
-                      inside_outside = 'outside',
-                      slot_name = 'overnight')
-    
-    all_time_slots = [am_peak, afternoon_offpeak, pm_peak, night]
-    
-    # Adding the peak/offpeak/etc category data back into the `main_data` DataFrame
-    for this_time_slot in all_time_slots:
-        main_data = this_time_slot.add_time_slot_data_to_main_data(main_data)
-    
-    # Creating the thresholds for the definitions of day-of-year windows and finding
-    # the observations that fall in each category/window.
-    # The windows used are:
-    #    -All days: Between Jan 1, 2019 and Dec 31, 2019
-    # Note: Currently, there is only one category that spans the entire year. 
-    #       The functionality was built in for future projects, when we might want 
-    #       to compare, say, speeds during the four seasons. 
-    
-    all_days_window = day_of_year_window(start_date=pd.to_datetime('Jan 1, 2019').day_of_year, 
-                                         end_date=pd.to_datetime('Dec 31, 2019').day_of_year, 
-                                         include_start = True, 
-                                         include_end = True,
-                                         inside_outside = 'inside',
-                                         window_name = 'all_days')
-    
-    main_data = all_days_window.add_window_data_to_main_data(main_data)
-    
-    return main_data
-
-
-def filter_group_summarize_fhwa(main_data):
-    '''
-    Defines the standard periods and summaries needed for calculating the 
-    FHWA reliability values.
-    To see the formal definitions of these periods, see CFR 23 490.511 and 
-    CFR 23 490.611:
-        https://www.ecfr.gov/current/title-23/chapter-I/subchapter-E/part-490/subpart-E/section-490.511
-        https://www.ecfr.gov/current/title-23/chapter-I/subchapter-E/part-490/subpart-F/section-490.611
-        https://www.law.cornell.edu/cfr/text/23/490.511
-        https://www.law.cornell.edu/cfr/text/23/490.611
-
-    Parameters
-    ----------
-    main_data : pd.DataFrame
-        Input dataframe containing raw speed data for every time period. 
-        It is expected that this dataframe will contain the following columns:
-            -"time_slot"
-            -"date_window"
-            -"day_of_week"
-            -"time"
-            -"day_of_year"
-
-    Returns
-    -------
-    all_summaries_concat : pd.DataFrame
-        DataFrame that contains all the standard summary data required for 
-        FHWA's reliability calculations.
-
-    '''
-    
-    #--------------------------------------------------------
-    # Step 1: Summarizing data for AM Peaks (only weekdays) -
-    #--------------------------------------------------------
-    
-    # Name for this summary
-    summary_name = 'am_peak'
-    
-    # Filters for Weekdays. Peak and afternoon-off-peak times.
-    time_slot_filter   = main_data['time_slot'].isin(['am_peak'])
-    day_of_year_filter = main_data['date_window'].isin(['all_days'])
-    time_filter        = np.repeat(True, len(main_data))
-    day_of_week_filter = main_data['day_of_week'].isin([0,1,2,3,4])
-    
-    # Combining all the filters
-    summary_filter = (time_slot_filter & 
-                      day_of_year_filter & 
-                      time_filter & 
-                      day_of_week_filter)
-    
-    # TODO: Need to find a more user-friendly way to define these filters
-    
-    # Columns used to group data for summaries
-    grouping_columns = ['data_origin','tmc_code']
-    
-    # Calculating the summaries
-    summarized_data_ampeak = calc_summaries_pipeline(
-        main_data=main_data, 
-        summary_name=summary_name,
-        summary_filter=summary_filter,
-        grouping_columns=grouping_columns)
-    
-    
-    #-------------------------------------------------------
-    # Step 2: Summarizing data for Mid-day (only weekdays) -
-    #-------------------------------------------------------
-    
-    # Name for this summary
-    summary_name = 'midday'
-    
-    # Filters for Weekdays. Peak and afternoon-off-peak times.
-    time_slot_filter   = main_data['time_slot'].isin(['midday'])
-    day_of_year_filter = main_data['date_window'].isin(['all_days'])
-    time_filter        = np.repeat(True, len(main_data))
-    day_of_week_filter = main_data['day_of_week'].isin([0,1,2,3,4])
-    
-    # Combining all the filters
-    summary_filter = (time_slot_filter & 
-                      day_of_year_filter & 
-                      time_filter & 
-                      day_of_week_filter)
-    
-    # TODO: Need to find a more user-friendly way to define these filters
-    
-    # Columns used to group data for summaries
-    grouping_columns = ['data_origin','tmc_code']
-    
-    # Calculating the summaries
-    summarized_data_midday = calc_summaries_pipeline(
-        main_data=main_data, 
-        summary_name=summary_name,
-        summary_filter=summary_filter,
-        grouping_columns=grouping_columns)
-    
-    
-    #--------------------------------------------------------
-    # Step 3: Summarizing data for PM Peaks (only weekdays) -
-    #--------------------------------------------------------
-    
-    # Name for this summary
-    summary_name = 'pm_peak'
-    
-    # Filters for Weekdays. Peak and afternoon-off-peak times.
-    time_slot_filter   = main_data['time_slot'].isin(['pm_peak'])
-    day_of_year_filter = main_data['date_window'].isin(['all_days'])
-    time_filter        = np.repeat(True, len(main_data))
-    day_of_week_filter = main_data['day_of_week'].isin([0,1,2,3,4])
-    
-    # Combining all the filters
-    summary_filter = (time_slot_filter & 
-                      day_of_year_filter & 
-                      time_filter & 
-                      day_of_week_filter)
-    
-    # TODO: Need to find a more user-friendly way to define these filters
-    
-    # Columns used to group data for summaries
-    grouping_columns = ['data_origin','tmc_code']
-    
-    # Calculating the summaries
-    summarized_data_pmpeak = calc_summaries_pipeline(
-        main_data=main_data, 
-        summary_name=summary_name,
-        summary_filter=summary_filter,
-        grouping_columns=grouping_columns)
-    
-    
-    #----------------------------------------------------
-    # Step 4: Summarizing data for overnight - all days -
-    #----------------------------------------------------
-    
-    # Name for this summary
-    summary_name = 'overnight'
-    
-    # Filters for Weekends - only considering 6am to 8pm.
-    time_slot_filter   = main_data['time_slot'].isin(['overnight'])
-    day_of_year_filter = main_data['date_window'].isin(['all_days'])
-    time_filter        = np.repeat(True, len(main_data))
-    day_of_week_filter = np.repeat(True, len(main_data))
-    
-    # Combining all the filters
-    summary_filter = (time_slot_filter & 
-                        day_of_year_filter & 
-                        time_filter & 
-                        day_of_week_filter)
-    
-    # TODO: Need to find a more user-friendly way to define these filters
-    
-    # Columns used to group data for summaries
-    grouping_columns = ['data_origin','tmc_code']
-    
-    # Calculating the summaries
-    summarized_data_overnight = calc_summaries_pipeline(
-        main_data=main_data, 
-        summary_name=summary_name,
-        summary_filter=summary_filter,
-        grouping_columns=grouping_columns)
-    
-    
-    #-----------------------------------------------------
-    # Step 5: Summarizing data for weekends - 6am to 8pm -
-    #-----------------------------------------------------
-    
-    # Name for this summary
-    summary_name = 'weekends'
-    
-    # Filters for Weekends - only considering 6am to 8pm.
-    time_slot_filter   = main_data['time_slot'].isin(['am_peak','midday','pm_peak'])
-    day_of_year_filter = main_data['date_window'].isin(['all_days'])
-    time_filter        = np.repeat(True, len(main_data))
-    day_of_week_filter = main_data['day_of_week'].isin([5,6])
-    
-    # Combining all the filters
-    summary_filter = (time_slot_filter & 
-                      day_of_year_filter & 
-                      time_filter & 
-                      day_of_week_filter)
-    
-    # TODO: Need to find a more user-friendly way to define these filters
-    
-    # Columns used to group data for summaries
-    grouping_columns = ['data_origin','tmc_code']
-    
-    # Calculating the summaries
-    summarized_data_weekends = calc_summaries_pipeline(
-        main_data=main_data, 
-        summary_name=summary_name,
-        summary_filter=summary_filter,
-        grouping_columns=grouping_columns)
-    
-    # Adding extra detail about this summary's time slot
-    #summarized_data_weekends['time_slot'] = '6am_to_8pm'
-    
-    
-    #--------------------------------------
-    # Step 6: Summarizing data - All-time -
-    #--------------------------------------
-    
-    # Name for this summary
-    summary_name = 'alltime'
-    
-    # Filters for alltime averages
-    time_slot_filter   = np.repeat(True, len(main_data))
-    day_of_year        = np.repeat(True, len(main_data))
-    time_filter        = np.repeat(True, len(main_data))
-    day_of_week_filter = np.repeat(True, len(main_data))
-    
-    # Combining all the filters
-    summary_filter = (time_slot_filter & 
-                      day_of_year &
-                      time_filter & 
-                      day_of_week_filter)
-    
-    # TODO: Need to find a more user-friendly way to define these filters
-    
-    # Columns used to group data for summaries
-    grouping_columns = ['data_origin','tmc_code']
-    
-    summarized_data_alltime = calc_summaries_pipeline(
-        main_data=main_data, 
-        summary_name=summary_name,
-        summary_filter=summary_filter,
-        grouping_columns=grouping_columns)
-    
-    # Adding extra detail about this summary's time slot
-    #summarized_data_alltime['time_slot'] = 'all_hours'
-    
-    # Creating list with all the summaries from the previous step
-    all_summaries = [summarized_data_ampeak.reset_index(),
-                     summarized_data_midday.reset_index(),
-                     summarized_data_pmpeak.reset_index(),
-                     summarized_data_overnight.reset_index(),
-                     summarized_data_weekends.reset_index(),
-                     summarized_data_alltime.reset_index()]
-    
-    # Concatenating all of the summaries into one large DataFrame
-    all_summaries_concat = pd.concat(all_summaries, ignore_index=True).reset_index(drop=True)
-    
-    return all_summaries_concat
-
-def calculate_standard_reliabily_mixed_traffic(all_summaries_concat, 
-                                               main_tmc_data):
-    '''
-    Calculates travel time reliability for mixed traffic according to FHWA's 
-    standards. 
-    Note: See "National Performance Measures for Congestion, Reliability, and 
-    Freight, and CMAQ Traffic Congestion":
-        https://www.fhwa.dot.gov/tpm/guidance/
-        https://www.fhwa.dot.gov/tpm/guidance/hif18040.pdf
-    
-    Parameters
-    ----------
-    all_summaries_concat : pd.DataFrame
-        Dataframe containing all of the summary data needed for the computation
-        of the reliability metrics. 
-    main_tmc_data : pd.DataFrame
-        Pandas DataFrame that contains the associated TMC data for all the TMC
-        segments (i.e., the data from all the "TMC_Identification.csv" files)
-
-    Returns
-    -------
-    reliability_summaries_all : pd.DataFrame
-        Dataframe containing the reliability data for each TMC segment.
-
-    '''
-    # For the mixed traffic data (i.e., for observations where 
-    # data_origin is in ['inrix', 'npmrds_from_inrix_trucks_and_passveh']):
-    #    Calculate 80th percentile divided by 50th percentile for four summary 
-    #    groups: am_peak, midday, pm_peak, weekends.
-    #    Then, take the highest one of all four. If that value is larger than 
-    #    1.5, the segment is deemd "unreliable". Otherwise, the segment is 
-    #    deemed "reliable".
-    
-
-    # Keeping only the relevant summaries
-    mixed_traffic_data = all_summaries_concat.loc[
-        (all_summaries_concat['summary_type'].isin(['am_peak', 
-                                                    'midday', 
-                                                    'pm_peak',
-                                                    'weekends'])) 
-        & (all_summaries_concat['data_origin'].isin(['inrix',
-                                                     'npmrds_from_inrix_trucks_and_passveh']))
-        ].reset_index(drop=True)
-    
-    # Calculating Level of Travel Time Reliability: 80th percentile divided by 
-    # 50th percentile (travel times)
-    mixed_traffic_data['LOTTR_80p_by_50p'] = (
-        mixed_traffic_data['ttime_80p'] / 
-        mixed_traffic_data['ttime_50p'])
-    
-    # Calculating the maximum of the Travel Time Reliability across all 
-    # summaries
-    reliability_summaries_mixed_traffic = (mixed_traffic_data
-        .groupby(['tmc_code','data_origin'])
-        .agg(
-            RawDataRows = pd.NamedAgg(column='count_obs', 
-                                       aggfunc='sum'),
-            SummaryCount = pd.NamedAgg(column='LOTTR_80p_by_50p', 
-                                       aggfunc='count'),
-            Reliability = pd.NamedAgg(column='LOTTR_80p_by_50p', 
-                                                   aggfunc='max'))
-        .reset_index())
-    
-    reliability_summaries_mixed_traffic['Reliability_Type'] = 'Mixed_Traffic'
-    
-    # Dropping rows that didn't have summaries for all periods needed
-    reliability_summaries_mixed_traffic = (
-        reliability_summaries_mixed_traffic.loc[
-            reliability_summaries_mixed_traffic['SummaryCount'] == 4]
-        .reset_index(drop=True))
-    
-    # Adding the binary "Reliable" column. 
-    reliability_summaries_mixed_traffic['Reliable'] = (
-        reliability_summaries_mixed_traffic['Reliability'] < 1.5)
-    
-    reliability_summaries_mixed_traffic = (reliability_summaries_mixed_traffic
-                                           [['tmc_code', 'data_origin', 
-                                             'Reliability_Type', 'RawDataRows', 
-                                             'SummaryCount', 'Reliability',
-                                             'Reliable']])
-    
-    return reliability_summaries_mixed_traffic
-
-def calculate_standard_reliability_trucks(all_summaries_concat, main_tmc_data):
-    '''
-    Calculates truck travel time reliability according to FHWA's standards. 
-    Note: See "National Performance Measures for Congestion, Reliability, and 
-    Freight, and CMAQ Traffic Congestion":
-        https://www.fhwa.dot.gov/tpm/guidance/
-        https://www.fhwa.dot.gov/tpm/guidance/hif18040.pdf
-        
-    Parameters
-    ----------
-    all_summaries_concat : pd.DataFrame
-        Dataframe containing all of the summary data needed for the computation
-        of the reliability metrics. 
-    main_tmc_data : pd.DataFrame
-        Pandas DataFrame that contains the associated TMC data for all the TMC
-        segments (i.e., the data from all the "TMC_Identification.csv" files)
-
-    Returns
-    -------
-    reliability_summaries_all : pd.DataFrame
-        Dataframe containing the reliability data for each TMC segment.
-
-    '''
-    # For truck traffic (data_origin='npmrds_from_inrix_trucks'):
-    #    Calculate 95th percentile divided by 50th percentile for the five 
-    #    summary groups: am_peak, midday, pm_peak, overnight and weekends.
-    #    Then, just take the maximum of those five values. 
-    #
-    # Note: Please note that, for trucks, we also have to analyze the 
-    #       "overnight" summary, which is absent in the mixed traffic 
-    #       summaries.
-    
-    # Keeping only the relevant summaries
-    truck_data = all_summaries_concat.loc[
-        (all_summaries_concat['summary_type'].isin(['am_peak', 
-                                                    'midday', 
-                                                    'pm_peak',
-                                                    'overnight',
-                                                    'weekends'])) & 
-        (all_summaries_concat['data_origin']=='npmrds_from_inrix_trucks')
-        ].reset_index(drop=True)
-    
-    # Calculating Level of Travel Time Reliability: 95th percentile divided by 
-    # 50th percentile (travel times)
-    truck_data['LOTTR_95p_by_50p'] = (
-        truck_data['ttime_95p'] / 
-        truck_data['ttime_50p'])
-    
-    # Calculating the maximum of the Travel Time Reliability across all 
-    # summaries
-    reliability_summaries_truck_traffic = (truck_data
-        .groupby(['tmc_code','data_origin'])
-        .agg(
-            RawDataRows = pd.NamedAgg(column='count_obs', 
-                                       aggfunc='sum'),
-            SummaryCount = pd.NamedAgg(column='LOTTR_95p_by_50p', 
-                                       aggfunc='count'),
-            Reliability = pd.NamedAgg(column='LOTTR_95p_by_50p', 
-                                                   aggfunc='max'))
-        .reset_index())
-
-    reliability_summaries_truck_traffic['Reliability_Type'] = 'Truck_Traffic'
-
-    # Dropping rows that didn't have summaries for all periods needed
-    reliability_summaries_truck_traffic = (
-        reliability_summaries_truck_traffic.loc[
-            reliability_summaries_truck_traffic['SummaryCount'] == 5]
-        .reset_index(drop=True))
-    
-    # Adding the binary "Reliable" column. 
-    reliability_summaries_truck_traffic['Reliable'] = (
-        reliability_summaries_truck_traffic['Reliability'] < 1.5)
-    
-    reliability_summaries_truck_traffic = (reliability_summaries_truck_traffic
-                                           [['tmc_code', 'data_origin', 
-                                             'Reliability_Type', 'RawDataRows', 
-                                             'SummaryCount', 'Reliability',
-                                             'Reliable']])
-    
-    return reliability_summaries_truck_traffic
-
-def calculate_standard_reliabilities(all_summaries_concat, 
-                                     main_data, 
-                                     main_tmc_data,
-                                     calc_mixed_traf_rel=True,
-                                     calc_truck_rel=True):
-    '''
-    Calculates the overall Reliability according to FHWA's standards. 
-    Note: See "National Performance Measures for Congestion, Reliability, and 
-    Freight, and CMAQ Traffic Congestion":
-        https://www.fhwa.dot.gov/tpm/guidance/
-        https://www.fhwa.dot.gov/tpm/guidance/hif18040.pdf
-
-    Parameters
-    ----------
-    all_summaries_concat : pd.DataFrame
-        Dataframe containing all of the summary data needed for the computation
-        of the reliability metrics. 
-    main_data : pd.DataFrame
-        Input dataframe containing raw speed data for every time period. 
-    main_tmc_data : pd.DataFrame
-        Pandas DataFrame that contains the associated TMC data for all the TMC
-        segments (i.e., the data from all the "TMC_Identification.csv" files)
-    calc_mixed_traf_rel : boolean
-        Flag that signals whether or not to calculate reliability for mixed 
-        traffic
-    calc_truck_rel : boolean
-        Flag that signals whether or not to calculate reliability for trucks
-
-    Returns
-    -------
-    reliability_summaries_all : pd.DataFrame
-        Dataframe containing the reliability data for each TMC segment.
-
-    '''
-    # Calculating overall Reliability. 
-    
-    # For the mixed traffic data (data_origin='npmrds_from_inrix_trucks_and_passveh'):
-    #    Calculate 80th percentile divided by 50th percentile for four summary 
-    #    groups: am_peak, midday, pm_peak, weekends.
-    #    Then, take the highest one of all four. If that value is larger than 1.5, 
-    #    the segment is deemed "unreliable". Otherwise, the segment is deemed "reliable".
-    
-    # For truck traffic (data_origin='npmrds_from_inrix_trucks'):
-    #    Calculate 95th percentile divided by 50th percentile for the five summary
-    #    groups: am_peak, midday, pm_peak, overnight and weekends.
-    #    Then, just take the maximum of those five values. 
-    #    Note: For trucks, this is a continuous value, while for mixed traffic the 
-    #    metric is just a binary "reliable"/"unreliable" variable.
-    
-    # List that will store all reliability results
-    reliability_dfs = []
-    
-    # Calculating reliability for mixed traffic
-    if calc_mixed_traf_rel:
-        reliability_summaries_mixed_traffic = (
-            calculate_standard_reliabily_mixed_traffic(all_summaries_concat, 
-                                                       main_tmc_data))
-        
-        # Finding missing TMC codes and re-including them
-        missing_tmc_codes_mixed_traf = find_missing_tmc_codes(main_data, 
-                                                   reliability_summaries_mixed_traffic)
-        
-        missing_tmc_codes_mixed_traf_df = (
-            pd.DataFrame({'tmc_code':missing_tmc_codes_mixed_traf,
-                          'data_origin':reliability_summaries_mixed_traffic['data_origin'].values[0]}))
-        
-        reliability_summaries_mixed_traffic = (
-            pd.concat([reliability_summaries_mixed_traffic, 
-                       missing_tmc_codes_mixed_traf_df],
-                      ignore_index=True).reset_index(drop=True))
-
-        reliability_dfs.append(reliability_summaries_mixed_traffic)
-    
-    # Calculating reliability for trucks
-    if calc_truck_rel:
-        reliability_summaries_truck_traffic = (
-            calculate_standard_reliability_trucks(all_summaries_concat, 
-                                                  main_tmc_data))
-        
-        missing_tmc_codes_truck = find_missing_tmc_codes(main_data, 
-                                                   reliability_summaries_truck_traffic)
-        # Finding missing TMC codes and re-including them
-        missing_tmc_codestruck_df = (
-                    pd.DataFrame({'tmc_code':missing_tmc_codes_truck,
-                                  'data_origin':reliability_summaries_truck_traffic['data_origin'].values[0]}))
-                
-        reliability_summaries_truck_traffic = (
-            pd.concat([reliability_summaries_truck_traffic, 
-                       missing_tmc_codestruck_df],
-                      ignore_index=True).reset_index(drop=True))
-        
-        reliability_dfs.append(reliability_summaries_truck_traffic)
-    
-    # Combining mixed traffic and truck reliability data
-    reliability_summaries_all = pd.concat(reliability_dfs,
-                                          ignore_index=True).reset_index(drop=True)
-    
-    return reliability_summaries_all
-
-
-def find_missing_tmc_codes(main_data, ref_data):
-    '''
-    Finds which TMC codes are missing in the `ref_data` from the original raw
-    dataset.
-
-    Parameters
-    ----------
-    main_data : pd.DataFrame
-        Input dataframe containing raw speed data for every time period. 
-    ref_data : pd.DataFrame
-        Reference data whose TMC codes will be checked against the original
-        raw data.
-
-    Returns
-    -------
-    missing_tmc_codes : LIST
-        List of TMC codes that are "missing" from `ref_data` (i.e., they exist
-        in `main_data`, but not in `ref_data`).
-
-    '''
-    # Getting unique TMC codes from both sets
-    main_data_unique = main_data['tmc_code'].unique()
-    ref_data_unique  = set(ref_data['tmc_code'].unique())
-    
-    # List that will hold missing TMC codes
-    missing_tmc_codes = []
-    
-    # Comparing the sets and finding which ones are missing
-    trash = pd.Series(main_data_unique).apply(
-        lambda x: missing_tmc_codes.append(x) 
-            if x not in ref_data_unique 
-            else None)
-    
-    return missing_tmc_codes
-
-def start_to_finish_fhwa_summaries_and_reliability(
-        input_data_folder='',
-        npmrds_geodata_path='',
-        road_str='',
-        chunk_size=100000,
-        export_raw_speed_data=False,
-        output_raw_data_filename_pickle='',
-        export_tmc_data=False,
-        output_tmc_data_filename_pickle='',
-        export_summary_data=False,
-        output_summary_data_filename_gpkg='',
-        export_reliability_data=False,
-        output_reliability_data_filename_gpkg=''):
-    '''
-    Does everything needed to calculate the FHWA reliability metrics from the 
-    zipped raw data files from RITIS. 
-    The several bells and whistles in this function's inputs are just controls
-    of whether or not to export some of the processed datasets to the local disk.
-
-    Parameters
-    ----------
-    input_data_folder : STR
-        String that indicates the folder to be investigated for the zipfiles 
-        containing the raw data
-    npmrds_geodata_path : STR
-        String that identifies where to find the NPMRDS shapefile. Needs to 
-        point to the ".shp" file. Typically, this file is just called "Texas.shp"
-    road_str: STR 
-        String used to filter road segments based on their names. This is also 
-        referred to as "the main searched road" in other places of this script.
-        The TMC segments will be filtered based on whether or not the 'road' 
-        column contains this string. To get the entire dataset back, just use 
-        an empty string ('').
-    chunk_size: INT
-        Integer used to determine number of rows read at a time by Pandas' 
-        read_csv method.
-    export_raw_speed_data : bool
-        Determines whether or not to export the raw speed data to disk. 
-        The default is False.
-    output_raw_data_filename_pickle : STR
-        Full (absolute) path of the PICKLE file containing the raw data
-        read in through this function.
-    export_tmc_data : bool
-        Determines whether or not to export the TMC Information data to disk. 
-        The default is False.
-    output_tmc_data_filename_pickle : STR
-        Full (absolute) path of the PICKLE file containing the TMC data
-        read in through this function.
-    export_summary_data : bool
-        Determines whether or not to export the summary data to disk. 
-        The default is False.
-    output_summary_data_filename_gpkg : STR
-        String that identifies the path and filename to give to the GeoDataFrame
-        that contains the summary data. This needs to be a GeoPackage
-        file ('.gpkg' extension).
-    export_reliability_data : bool
-        Determines whether or not to export the reliability data to disk. 
-        The default is False.
-    output_reliability_data_filename_gpkg : STR
-        String that identifies the path and filename to give to the GeoDataFrame
-        that contains the reliability data. This needs to be a GeoPackage
-        file ('.gpkg' extension). The default is ''.
-
-    Returns
-    -------
-    output_dict : DICT
-        Dictionary containing four datasets:
-            -main_data: pd.DataFrame that contains all the raw data with the 
-                extra processing columns 
-            -main_tmc_data: pd.DataFrame that contains the TMC information
-                about all the links
-            -all_summaries_with_geoms: gpd.GeoDataFrame that contains all the
-                summary data
-            -reliability_summaries_with_geoms: gpd.GeoDataFrame that contains
-                all the reliability data
-    '''
-    
-    ############################
-    ### STEP 1: READING DATA ###
-    ############################
-    
-    # Actually reading in the whole data and generating the filtered output files
-    all_data = read_batch_of_raw_data(input_data_folder, 
-                                      road_str, 
-                                      chunk_size)
-    
-    # Fishing out the `main_data` and `main_tmc_data` DataFrames.
-    main_data = all_data['main_data']
-    main_tmc_data  = all_data['main_tmc_data']
-
-    # Exporting raw data and TMC information
-    if export_raw_speed_data:
-        main_data.to_pickle(output_raw_data_filename_pickle)
-    
-    if export_tmc_data:
-        main_tmc_data.to_pickle(output_tmc_data_filename_pickle)
-
-    ###################################################
-    ### STEP 2: PRE-POCESSING COLUMNS FOR FILTERING ###
-    ###################################################
-    
-    # Fixing datetime information: adding time and day_of_week columns
-    main_data = fix_datetime_columns(main_data)
-    
-    # Adding timeslot and date window columns
-    main_data = define_standard_fhwa_timeslots(main_data)
-    
-    ############################################################
-    ### STEP 3: FILTERING, GROUPING AND SUMMARIZING THE DATA ###
-    ############################################################
-    
-    all_summaries_concat = filter_group_summarize_fhwa(main_data)
-    
-    all_summaries_with_geoms = add_geometries_to_summaries(
-                                   summarized_data=all_summaries_concat, 
-                                   main_tmc_data=main_tmc_data,
-                                   npmrds_geodata_path=npmrds_geodata_path)
-    
-    if export_summary_data:
-        all_summaries_with_geoms.to_file(output_summary_data_filename_gpkg, 
-                                         driver='GPKG',
-                                         layer='main')
-    
-    ################################################
-    ### STEP 4: CALCULATING RELIABILITY MEASURES ###
-    ################################################
-    
-    reliability_summaries_all = calculate_standard_reliabilities(
-        all_summaries_concat=all_summaries_concat, 
-        main_data=main_data, 
-        main_tmc_data=main_tmc_data,
-        calc_mixed_traf_rel=True,
-        calc_truck_rel=True)
-    
-    reliability_summaries_with_geoms = add_geometries_to_summaries(
-        summarized_data=reliability_summaries_all, 
-        main_tmc_data=main_tmc_data,
-        npmrds_geodata_path=npmrds_geodata_path)
-    
-    if export_reliability_data:
-        reliability_summaries_with_geoms.to_file(output_reliability_data_filename_gpkg, 
-                                                 driver='GPKG',
-                                                 layer='main')
-    
-    output_dict = {'main_data':main_data,
-                   'main_tmc_data':main_tmc_data,
-                   'all_summaries_with_geoms':all_summaries_with_geoms,
-                   'reliability_summaries_with_geoms':reliability_summaries_with_geoms}
-    
-    return output_dict
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Mar 15 13:13:08 2021
+
+@author: DIASF
+"""
+
+import os
+import re
+import operator
+import zipfile
+import functools
+import concurrent.futures
+import pandas as pd
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+from pyarrow import csv as pa_csv
+
+# Numba is optional. When it is available, the summary percentiles (the inner
+# loop of the reliability computations) are evaluated by a JIT-compiled
+# parallel kernel instead of one Python lambda per group per percentile.
+# Pinning the cache directory makes the cache=True kernels below persist
+# their compiled machine code across runs (and across the per-year worker
+# processes), so only the very first run ever pays the JIT compile cost.
+os.environ.setdefault('NUMBA_CACHE_DIR',
+                      os.path.join(os.path.expanduser('~'), '.numba_cache'))
+try:
+    import numba
+except ImportError:
+    numba = None
+import geopandas as gpd
+import pyogrio
+import shapely
+
+# Patterns used to match the first line of a zipfile's Contents.txt to the
+# data origin it came from. Compiled once at import time so the folder scans
+# don't re-build the regexes for every zipfile.
+_ORIGIN_PATTERNS = {
+    'inrix':
+        re.compile(r'.*INRIX TMC.*'),
+    'npmrds_from_inrix_pass_vehicles':
+        re.compile(r'.*NPMRDS from INRIX \(Passenger vehicles\).*'),
+    'npmrds_from_inrix_trucks':
+        re.compile(r'.*NPMRDS from INRIX \(Trucks\).*'),
+    'npmrds_from_inrix_trucks_and_passveh':
+        re.compile(r'.*NPMRDS from INRIX \(Trucks and passenger vehicles\).*')}
+
+# Pattern that picks out the zipfiles in the input folder
+_ZIP_RE = re.compile(r'.*zip$')
+
+# Numeric measure columns read as float32 rather than float64. The source
+# data only carries 2-3 significant digits, and the mean/percentile passes
+# downstream are memory-bound, so halving the bytes per value roughly
+# doubles their throughput. Names missing from a given extract are simply
+# ignored by the CSV reader.
+_FLOAT32_COLUMNS = ('speed', 'average_speed', 'reference_speed',
+                    'historical_average_speed', 'travel_time_seconds',
+                    'travel_time_minutes')
+
+def which_zip_is_which_data_source(input_data_folder):
+    '''
+    Function that searches the input data folder for zip files and determines 
+    which zipfiles contain the data needed for this task. The function also 
+    identifies the type of data/data source for each of those zipfiles. 
+    For example: 'texas_inrix_npmrds_15min(1).zip' contains the 'NPMRDS from 
+    INRIX (Passenger vehicles)' data.
+    
+    Parameters
+    ----------
+    input_data_folder : STR
+        String that indicates the folder to be investigated for the zipfiles 
+        containing the raw data
+
+    Returns
+    -------
+    data_paths_dict: DICT
+        Dictionary that contains information about where the files for each 
+        data source is located. It should be structured as follows:
+            {'data_origin_1':{'zip_file':'zip_file_1_full_path.zip',
+                              'raw_data_file':'raw_data_file_name_1.csv'},
+             'data_origin_2':{'zip_file':'zip_file_2_full_path.zip',
+                              'raw_data_file':'raw_data_file_name_2.csv'},
+             ...}
+    '''
+    
+    # Find all zip files in input folder. os.scandir caches the file-type
+    # info from the directory read itself, so (unlike listdir + isfile) this
+    # doesn't stat() every entry a second time.
+    with os.scandir(input_data_folder) as folder_entries:
+        folder_zips = [entry.name for entry in folder_entries
+                       if entry.is_file() and _ZIP_RE.match(entry.name)]
+    
+    # Dictionary that will store the output
+    data_paths_dict = {}
+    
+    # Looping over zipfiles
+    for this_zip_file in folder_zips:
+        with zipfile.ZipFile(os.path.join(input_data_folder, 
+                                          this_zip_file)) as this_zip:
+            
+            # Checking if this is a data extract from RITIS' massive data downloader
+            files_in_zip = this_zip.namelist()
+            if 'Contents.txt' in files_in_zip:
+                
+                #Extracting the name of the raw data CSV file inside this zipfile
+                raw_data_file = [this_file for this_file in files_in_zip if 
+                                 this_file !='Contents.txt' and 
+                                 this_file !='TMC_Identification.csv'][0]
+                
+                # Performing a RegEx search to find which data source this 
+                # zipfile originally came from
+                with this_zip.open('Contents.txt','r') as content_file:
+                    this_content = content_file.readline().decode('utf-8')
+                    for this_data_origin, this_pattern in (
+                            _ORIGIN_PATTERNS.items()):
+                        if this_pattern.match(this_content):
+                            data_paths_dict[this_data_origin] = {
+                                'zip_file':os.path.join(input_data_folder,
+                                                        this_zip_file),
+                                'raw_data_file':raw_data_file}
+    return data_paths_dict
+
+def read_csv_get_specific_road_segments(data_origin,
+                                        raw_data_zipfile,
+                                        raw_data_filename_in_zip,
+                                        road_str,chunk_size,
+                                        raw_data_chunks=None,
+                                        tmc_data_parts=None):
+    """
+    Function used to read in raw speed and TMC segment data. This function will 
+    likely be called multiple times because of the several different sources of 
+    input files. For example: INRIX, NPMRDS from INRIX, etc.
+    
+    INPUT VARIABLES:
+    ----------------
+    data_origin: STR 
+       String that characterizes the origin of the data. Sample values: 
+       'inrix','npmrds_from_inrix_trucks', 'npmrds_from_pass_vehicles'
+    raw_data_zipfile: STR
+        String that contains the file/folder location of the zipfile to be read
+    raw_data_filename_in_zip: STR
+        String that contains the filename of the raw data inside the zipfile
+    road_str: STR used to filter road segments based on their names. The TMC 
+        segments will be filtered based on whether or not the 'road' column 
+        contains this string. To get the entire dataset back, just use an 
+        empty string ('').
+    chunk_size: INT
+        Approximate number of rows per chunk. Used to size the (byte-based)
+        blocks of PyArrow's streaming CSV reader.
+    raw_data_chunks: LIST
+        List containing the several chunks of input files thus far.
+        The first time this function is called, this should just be an empty list.
+    tmc_data_parts: LIST 
+        List containing the several tmc_data inputs from the multiple times this 
+        function is called.
+                        
+    OUTPUT:
+    -------
+    output_dict : DICT
+        Dictionary that contains two values: 'raw_data_chunks' and 'tmc_data_parts':
+        raw_data_chunks: LIST 
+            List of pd.DataFrames that contain the several chunks of all the 
+            input  data-files, including the chunks created in the current 
+            execution of this method. 
+            Note: It is expected that these chunks will later be concatenated 
+            into one large DataFrame afterwards.
+        tmc_data_parts: LIST 
+            List of pd.DataFrames containing the analogous TMC data 
+            (i.e., the data in the "TMC_Identification.csv" files).
+    """ 
+    
+    if not raw_data_chunks:
+        raw_data_chunks = []
+    if not tmc_data_parts:
+        tmc_data_parts = []
+    
+    # Opening the zipfile
+    with zipfile.ZipFile(raw_data_zipfile) as this_zip:
+        
+        # Reading in the TMC data from the zipfile
+        with this_zip.open('TMC_Identification.csv','r') as tmc_data_file:
+            tmc_data = pd.read_csv(tmc_data_file, low_memory=False)
+    
+        # Adding extra column about data origin and storing the final result
+        tmc_data['data_origin'] = data_origin
+
+        # Fixing column names
+        tmc_data = tmc_data.rename({'tmc':'tmc_code',
+                                    'intersection':'intersection_',
+                                    'state':'state_',
+                                    'type':'type_'},axis=1)
+
+        # Querying main searched road. The plain-substring `str.contains`
+        # (regex=False) runs in C, and `na=False` handles the segments with
+        # no road name without a separate fillna pass. An empty road_str
+        # means "keep everything", so the scan is skipped entirely.
+        if road_str:
+            tmc_data = tmc_data.loc[
+                tmc_data['road'].str.contains(road_str, regex=False,
+                                              na=False)]
+
+        # Unnamed segments keep an empty-string road (rather than NaN) so
+        # that later groupbys on 'road' don't silently drop them. Doing this
+        # after the filter touches far fewer rows.
+        tmc_data['road'] = tmc_data['road'].fillna('')
+        
+        # Sometimes, this DataFrame has multiple rows for the same TMC.
+        # This step is taken to de-duplicate the TMCs data, keeping the row
+        # with the latest active_end_date. Sorting only by active_end_date is
+        # enough: drop_duplicates is stable, so keep='last' picks the most
+        # recent row per tmc_code without the old sort + groupby + reassemble
+        # round trip.
+        tmc_data = (tmc_data
+                    .sort_values(by='active_end_date')
+                    .drop_duplicates('tmc_code', keep='last',
+                                     ignore_index=True))
+        tmc_data_parts.append(tmc_data)
+        
+        # Subset of the TMC data with only the relevant columns
+        tmc_data_sub = tmc_data[['tmc_code','road','data_origin']]
+        
+        # Set of TMC codes that belong to the main searched road. Only raw
+        # data rows matching one of these TMCs are worth keeping.
+        wanted_codes = np.sort(tmc_data_sub['tmc_code'].unique())
+        wanted_tmcs = pa.array(wanted_codes)
+
+        # One categorical dtype shared by every chunk, so the tmc_code
+        # columns concat as integer codes instead of per-chunk Python
+        # strings. Building it from the sorted valid codes means the
+        # categories line up across chunks with no union_categoricals step.
+        tmc_dtype = pd.CategoricalDtype(categories=wanted_codes)
+
+        # Reading in the raw data with PyArrow's streaming CSV reader and only
+        # keeping segments that are related to the main searched road. The
+        # road filter is pushed down onto the Arrow record batches, so rows
+        # for other roads are discarded before ever being converted to pandas.
+        # The 'road'/'data_origin' columns are NOT attached here: doing a
+        # merge per chunk would run a hash-join and copy those strings into
+        # every chunk. They get attached once, after the chunks are
+        # concatenated (see read_one_set_of_raw_data).
+        with this_zip.open(raw_data_filename_in_zip,'r') as raw_data_file:
+            with pa_csv.open_csv(
+                    raw_data_file,
+                    # Arrow blocks are sized in bytes; a RITIS row is roughly
+                    # 256 bytes, so chunk_size rows maps to chunk_size*256
+                    # bytes per block.
+                    read_options=pa_csv.ReadOptions(
+                        block_size=max(chunk_size, 1) * 256),
+                    convert_options=pa_csv.ConvertOptions(
+                        column_types={
+                            'tmc_code': pa.string(),
+                            # Parsing the timestamps here means the later
+                            # fix_datetime_columns step never has to run
+                            # pd.to_datetime over the full dataset.
+                            'measurement_tstamp': pa.timestamp('s'),
+                            **{this_col: pa.float32()
+                               for this_col in _FLOAT32_COLUMNS}})) as reader:
+                for raw_batch in reader:
+                    # Rows for other roads and rows without a speed reading
+                    # are useless downstream, so both filters run here on
+                    # the Arrow batch — before the rows ever take up pandas
+                    # memory or ride through the concat.
+                    batch_mask = pc.and_(
+                        pc.is_in(raw_batch['tmc_code'],
+                                 value_set=wanted_tmcs),
+                        pc.is_valid(raw_batch['speed']))
+                    raw_data = (pa.Table
+                                .from_batches([raw_batch])
+                                .filter(batch_mask)
+                                .to_pandas())
+                    if raw_data.shape[0] == 0:
+                        continue
+                    raw_data['tmc_code'] = (raw_data['tmc_code']
+                                            .astype(tmc_dtype))
+                    # Cheap per-chunk dedup (the origin is constant within
+                    # this file, so tmc_code + timestamp identifies a row).
+                    # Duplicates spanning chunk boundaries are caught by the
+                    # global dedup after the concat.
+                    raw_data = raw_data.drop_duplicates(
+                        subset=['tmc_code','measurement_tstamp'],
+                        ignore_index=True)
+                    # No defensive .copy() here: the chunks are never
+                    # mutated after append, and the later concat builds
+                    # a fresh contiguous frame anyway.
+                    raw_data_chunks.append(raw_data)
+    
+    # Since we need to return more than one output, the multiple outputs have 
+    # been added to a dictionary.
+    output_dict = {'raw_data_chunks':raw_data_chunks,
+                   'tmc_data_parts':tmc_data_parts}
+     
+    return output_dict
+
+def read_one_set_of_raw_data(input_data_folder,road_str,chunk_size,data_origin,
+                             data_paths_dict=None):
+    '''
+    Looks into the input folder and reads in the raw data contained in only 
+    one of the zipfiles.
+    
+    Parameters
+    ----------
+    input_data_folder : STR
+        String that indicates the folder to be investigated for the zipfiles 
+        containing the raw data
+    road_str: STR 
+        String used to filter road segments based on their names. This is also 
+        referred to as "the main searched road" in other places of this script.
+        The TMC segments will be filtered based on whether or not the 'road' 
+        column contains this string. To get the entire dataset back, just use 
+        an empty string ('').
+    chunk_size : INT
+        Integer that defines the approximate number of rows per chunk
+        when streaming the raw data CSVs.
+    data_origin: STR 
+       String that characterizes the origin of the data. Sample values: 
+       'inrix','npmrds_from_inrix_trucks', 'npmrds_from_pass_vehicles'
+    data_paths_dict: DICT, optional
+        Output of `which_zip_is_which_data_source` for the input folder, if
+        the caller has already computed it. When omitted, the folder is
+        scanned here.
+
+    Returns
+    -------
+    output_dict: DICT
+        Dictionary with two entries: "main_data" and "main_tmc_data".
+        main_data : pd.DataFrame
+            Pandas DataFrame that contains the actual raw speed data for the main 
+            searched road
+        main_tmc_data : pd.DataFrame
+            Pandas DataFrame that contains the associated TMC data for all the 
+            TMC segments on the main searched road
+
+    '''
+
+    # Searching the input folder for zipfiles and determining where the relevant
+    # raw data files are. This function also tells you which "data_origin" is 
+    # associated with each of the zipfiles. Batch callers pass the dict in,
+    # so the folder (and every zipfile's Contents.txt) is only scanned once
+    # per batch instead of once per origin.
+    if data_paths_dict is None:
+        data_paths_dict = which_zip_is_which_data_source(input_data_folder)
+    
+    
+    # This is an empty list that will store the DataFrame chunks from reading 
+    # in the raw speed data.
+    raw_data_chunks = []
+    
+    # This is an empty list that will store the DataFrames containing the TMC-
+    # segment  link data that is associated with each data source (i.e., the 
+    # data in the "TMC_Identification.csv" files)
+    tmc_data_parts = []
+    
+    
+    raw_data_zipfile = data_paths_dict[data_origin]['zip_file']
+    raw_data_filename_in_zip = data_paths_dict[data_origin]['raw_data_file']
+    results_dict = read_csv_get_specific_road_segments(
+                             data_origin=data_origin,
+                             raw_data_zipfile=raw_data_zipfile,
+                             raw_data_filename_in_zip=raw_data_filename_in_zip,
+                             road_str=road_str,
+                             chunk_size=chunk_size,
+                             raw_data_chunks=raw_data_chunks,
+                             tmc_data_parts=tmc_data_parts)
+    raw_data_chunks = results_dict['raw_data_chunks']
+    tmc_data_parts = results_dict['tmc_data_parts']
+    
+    # Concatenating all raw data chunks into one single DataFrame
+    main_data = pd.concat(raw_data_chunks, ignore_index=True, copy=False)
+
+    # Concatenating all TMC data parts into one single DataFrame
+    main_tmc_data = pd.concat(tmc_data_parts, ignore_index=True, copy=False)
+
+    # Attaching the 'road' and 'data_origin' columns once, on the final
+    # concatenated frame. The read step only keeps rows whose tmc_code shows
+    # up in the TMC data, so a single dictionary lookup per row is all that
+    # is needed (much cheaper than merging every chunk separately).
+    road_by_tmc = dict(zip(main_tmc_data['tmc_code'],
+                           main_tmc_data['road']))
+    main_data['road'] = (main_data['tmc_code'].map(road_by_tmc)
+                         .astype('category'))
+    main_data['data_origin'] = pd.Categorical(
+        np.repeat(data_origin, len(main_data)))
+
+    # Making sure there are no duplicates. If there are, they are averaged out.
+    #main_data = main_data.groupby(['data_origin','tmc_code','measurement_tstamp']).mean().reset_index()
+    main_data = main_data.drop_duplicates(
+        subset=['data_origin','tmc_code','measurement_tstamp'],
+        ignore_index=True)
+
+    # Since we need to return more than one output, the multiple outputs have
+    # been added to a dictionary.
+    output_dict = {'main_data':main_data,
+                   'main_tmc_data':main_tmc_data}
+
+    return output_dict
+
+
+def read_batch_of_raw_data(input_data_folder,road_str,chunk_size):
+    '''
+    Looks into the input folder and reads all of the zipfiles.
+    
+    Parameters
+    ----------
+    input_data_folder : STR
+        String that indicates the folder to be investigated for the zipfiles 
+        containing the raw data
+    road_str: STR 
+        String used to filter road segments based on their names. This is also 
+        referred to as "the main searched road" in other places of this script.
+        The TMC segments will be filtered based on whether or not the 'road' 
+        column contains this string. To get the entire dataset back, just use 
+        an empty string ('').
+    chunk_size : INT
+        Integer that defines the approximate number of rows per chunk
+        when streaming the raw data CSVs.
+
+    Returns
+    -------
+    output_dict: DICT
+        Dictionary with two entries: "main_data" and "main_tmc_data".
+        main_data : pd.DataFrame
+            Pandas DataFrame that contains the actual raw speed data for the main 
+            searched road
+        main_tmc_data : pd.DataFrame
+            Pandas DataFrame that contains the associated TMC data for all the 
+            TMC segments on the main searched road            
+
+    '''
+    # Searching the input folder for zipfiles and determining where the relevant
+    # raw data files are. This function also tells you which "data_origin" is 
+    # associated with each of the zipfiles.
+    data_paths_dict = which_zip_is_which_data_source(input_data_folder)
+
+    # Parquet ingest cache. Re-running the batch read costs minutes of
+    # decompression and CSV parsing; re-reading the columnar cache written
+    # at the end of this function takes seconds. The cache is only trusted
+    # when it is newer than every zipfile it was built from, and it is keyed
+    # on road_str because that filter changes what gets stored.
+    cache_tag = re.sub(r'[^A-Za-z0-9_-]', '_', road_str) or 'all'
+    main_data_cache = os.path.join(
+        input_data_folder, f'.cache_{cache_tag}_main_data.parquet')
+    tmc_data_cache = os.path.join(
+        input_data_folder, f'.cache_{cache_tag}_main_tmc_data.parquet')
+    zip_mtimes = [os.path.getmtime(this_paths['zip_file'])
+                  for this_paths in data_paths_dict.values()]
+    if (zip_mtimes
+            and os.path.isfile(main_data_cache)
+            and os.path.isfile(tmc_data_cache)
+            and min(os.path.getmtime(main_data_cache),
+                    os.path.getmtime(tmc_data_cache)) >= max(zip_mtimes)):
+        return {'main_data': pd.read_parquet(main_data_cache),
+                'main_tmc_data': pd.read_parquet(tmc_data_cache)}
+
+    # This is an empty list that will store the DataFrames containing the raw
+    # speed data.
+    main_data_parts = []
+    
+    # This is an empty list that will store the DataFrames containing the TMC-
+    # segment link data that is associated with each data source (i.e., the 
+    # data in the "TMC_Identification.csv" files)
+    tmc_data_parts = []
+    
+    # Actually running the batch input process. Each data origin lives in
+    # its own independent zipfile and the work is CPU-bound (decompression +
+    # CSV parsing), so the origins are read in parallel worker processes.
+    # executor.map preserves the origin order, which keeps the concatenated
+    # outputs identical to the old sequential loop.
+    read_one_origin = functools.partial(read_one_set_of_raw_data,
+                                        input_data_folder,
+                                        road_str,
+                                        chunk_size,
+                                        data_paths_dict=data_paths_dict)
+    with concurrent.futures.ProcessPoolExecutor(
+            max_workers=max(1, min(len(data_paths_dict),
+                                   os.cpu_count()))) as executor:
+        for this_batch_results in executor.map(read_one_origin,
+                                               data_paths_dict):
+            main_data_parts.append(this_batch_results['main_data'])
+            tmc_data_parts.append(this_batch_results['main_tmc_data'])
+    
+    # Concatenating all main data parts into one single DataFrame
+    main_data = pd.concat(main_data_parts, ignore_index=True, copy=False)
+    
+    # Note: rows with no speed data never make it this far; the read path
+    # drops them per chunk, since this whole process is geared towards
+    # finding averages (and percentiles) of speeds.
+
+    # Concatenating all TMC data parts into one single DataFrame
+    main_tmc_data = pd.concat(tmc_data_parts, ignore_index=True, copy=False)
+
+    # Casting the repeating string columns of the TMC data to the category
+    # dtype. Later merges/groupbys on these keys then hash small integer
+    # codes instead of Python strings, and the columns take up a fraction of
+    # the memory.
+    for this_col in ('tmc_code', 'road', 'direction', 'state_', 'county',
+                     'data_origin'):
+        if this_col in main_tmc_data.columns:
+            main_tmc_data[this_col] = main_tmc_data[this_col].astype('category')
+
+    # Applying the same category mapping to the raw data's tmc_code column so
+    # that both sides of the later geometry joins share one dictionary of
+    # codes. The raw data was filtered against the TMC data above, so every
+    # code is guaranteed to be present in the categories. The per-origin
+    # reads already deliver these columns as categoricals, but their
+    # categories differ between origins, so the concat above falls back to
+    # object dtype — this re-cast restores one shared dictionary.
+    main_data['tmc_code'] = main_data['tmc_code'].astype(
+        pd.CategoricalDtype(main_tmc_data['tmc_code'].cat.categories))
+    for this_col in ('road', 'data_origin'):
+        main_data[this_col] = main_data[this_col].astype('category')
+
+    # Making sure there are no duplicates across data origins. Rather than
+    # letting drop_duplicates hash the three key columns separately, the
+    # category codes and the factorized timestamps are packed into one exact
+    # int64 composite key, and the dedup becomes a single pass over one
+    # contiguous integer column. (Exact, not a hash: the factors are scaled
+    # so no two distinct key triples can collide.)
+    tstamp_codes, tstamp_uniques = pd.factorize(
+        main_data['measurement_tstamp'])
+    n_origins = len(main_data['data_origin'].cat.categories)
+    composite_keys = (
+        (main_data['tmc_code'].cat.codes.to_numpy('int64') * n_origins
+         + main_data['data_origin'].cat.codes.to_numpy('int64'))
+        * max(len(tstamp_uniques), 1)
+        + tstamp_codes)
+    main_data = (main_data
+                 .loc[~pd.Index(composite_keys).duplicated(keep='first')]
+                 .reset_index(drop=True))
+
+    # Best-effort write of the ingest cache checked at the top of this
+    # function. A read-only input folder just means the next run pays the
+    # CSV parse again.
+    try:
+        main_data.to_parquet(main_data_cache, compression='snappy',
+                             index=False)
+        main_tmc_data.to_parquet(tmc_data_cache, compression='snappy',
+                                 index=False)
+    except OSError:
+        pass
+
+    # Since we need to return more than one output, the multiple outputs have
+    # been added to a dictionary.
+    output_dict = {'main_data':main_data,
+                   'main_tmc_data':main_tmc_data}
+
+    return output_dict
+
+
+def fix_datetime_columns(main_data):
+    '''
+    Generates an actual datetime column in the "main_data" DataFrame by parsing 
+    the text-based timestamp column. Also extracts day-of-week and time info 
+    into separate columns.
+
+    Parameters
+    ----------
+    main_data : pd.DataFrame
+        The pandas DataFrame that contains all the raw data from the RITIS
+        website (INRIX/NPMRDS speeds)
+
+    Returns
+    -------
+    main_data : pd.DataFrame
+        The same DataFrame as the input, except that now, the DataFrame has a 
+        few new datetime-related columns. Namely:
+            -day_of_week: indicates the row's day of the week as a number from 
+                0 (Monday) to 6 (Sunday)
+            -day_of_week_str: indicates the row's day of the week as a string
+                of text
+            -minute_of_day: the row's time of day expressed as whole minutes
+                after midnight (0-1439)
+
+    '''
+    # Transforming STRING timestamp into an actual datetime format. The main
+    # read path already parses the timestamps inside the CSV reader, so this
+    # is normally a no-op and only kicks in for data that arrived some other
+    # way (e.g., re-loaded from a plain CSV).
+    if not pd.api.types.is_datetime64_any_dtype(main_data['measurement_tstamp']):
+        main_data['measurement_tstamp'] = pd.to_datetime(main_data['measurement_tstamp'])
+    
+    # Extracting day-of-week data and making it more readable.
+    # Monday=0, Sunday=6
+    main_data['day_of_week'] = main_data.measurement_tstamp.dt.day_of_week
+    # The day-of-week numbers double as category codes, so the readable
+    # labels come from a single from_codes gather (the old per-row dict
+    # lookup via .apply invoked Python once per observation).
+    main_data['day_of_week_str'] = pd.Categorical.from_codes(
+        main_data['day_of_week'].to_numpy(dtype='int8'),
+        categories=['0 - Monday', '1 - Tuesday', '2 - Wednesday',
+                    '3 - Thursday', '4 - Friday', '5 - Saturday',
+                    '6 - Sunday'])
+    
+    
+    # Extracting day-of-year data
+    main_data['day_of_year'] = main_data.measurement_tstamp.dt.day_of_year
+    
+    # Extracting the time-of-day value as integer minute-of-day (0-1439).
+    # A datetime.time object per row (the old 'time' column) costs a full
+    # PyObject per cell and forces object-dtype comparisons; the time-slot
+    # filters compare against this int16 column with plain NumPy ufuncs
+    # instead.
+    main_data['minute_of_day'] = (
+        (main_data['measurement_tstamp'].values
+         .astype('datetime64[m]')
+         .view('int64') % (24*60))
+        .astype('int16'))
+
+    return main_data
+
+class time_slot():
+    '''
+    Class that is used to label the observations in the `main_data` DataFrame 
+    (that contains all the raw data from the RITIS speeds database) according 
+    to the time of day. For example: am_peak, pm_peak, etc.
+    ''' 
+    def __init__(self,time_start,time_end,include_start, include_end, 
+                 inside_outside,slot_name):
+        '''
+        Instantiates `time_slot`.
+        
+        Parameters
+        ----------
+        time_start : datetime.time
+            Start time of the time slot
+        time_end : datetime.time
+            End time of the time slot
+        include_start : BOOL
+            Indicates whether to use >= or just > for time_start
+        include_end : BOOL
+            Indicates whether to use <= or just < for time_end
+        inside_outside : STR
+            Indicates whether the time slot refers to the time inside or outside
+            of the start and end times. To be more specific:
+                If inside_outside=="inside", then the time slot refers to the 
+                time AFTER time_start but BEFORE time_end. 
+                If inside_outside=="outside" , then the time slot refers to the 
+                time BEFORE time_start but AFTER time_end (e.g.: before 6am and 
+                after 10pm). 
+        slot_name : STR
+            Describes the name of the time slot. Typical names include "am_peak",
+            "pm_peak", "off_peak".
+
+        Returns
+        -------
+        The newly-created instance of this class.
+
+        '''
+        self.time_start     = time_start
+        self.time_end       = time_end
+        # Integer minute-of-day equivalents of the start/end times. The
+        # filters compare these against main_data's int 'minute_of_day'
+        # column, which is orders of magnitude faster than comparing
+        # datetime.time objects element-wise.
+        self.time_start_min = time_start.hour*60 + time_start.minute
+        self.time_end_min   = time_end.hour*60 + time_end.minute
+        self.include_start  = include_start
+        self.include_end    = include_end
+        self.inside_outside = inside_outside
+        self.slot_name      = slot_name
+        
+    
+    def get_filter(self, main_data):
+        '''
+        Gets the filter/mask that indicates which of the INRIX observations belong
+        to this specific time slot.
+        
+        Parameters
+        ----------
+        main_data : pd.DataFrame
+            The pandas DataFrame that contains all the raw data from the RITIS
+            website (INRIX/NPMRDS speeds)
+        
+        Returns
+        -------
+        ts_filter : pd.Series (bool)
+            An array of BOOL variables that indicates whether or not each 
+            observation belongs to this specific time slot. The array has length
+            equal to the number of rows in main_data.
+        '''
+        
+        try:
+            return self.ts_filter
+        except: 
+            minute_of_day = main_data['minute_of_day']
+            # Folding the include_start/include_end flags into the choice of
+            # comparison operator gives one vectorized compare per bound,
+            # instead of OR-ing extra equality masks onto the filter.
+            op_start = operator.le if self.include_start else operator.lt
+            op_end = operator.le if self.include_end else operator.lt
+            if self.inside_outside == 'inside':
+                this_filter = (op_start(self.time_start_min, minute_of_day) &
+                               op_end(minute_of_day, self.time_end_min))
+            elif self.inside_outside == 'outside':
+                this_filter = (op_start(minute_of_day, self.time_start_min) |
+                               op_end(self.time_end_min, minute_of_day))
+            self.ts_filter = this_filter
+            return self.ts_filter
+        
+    def add_time_slot_data_to_main_data(self, main_data):
+        '''
+        Adds the 'time_slot' column to the data and applies `time_slot`'s name
+        to the appropriate rows.
+
+        Parameters
+        ----------
+        main_data : pd.DataFrame
+            The pandas DataFrame that contains all the raw data from the RITIS
+            website (INRIX/NPMRDS speeds)
+
+        Returns
+        -------
+        main_data : pd.DataFrame
+            The same DataFrame as was passed in the input. The only difference 
+            is that now, the `time_slot`'s name was applied to the rows that 
+            fall within the `time_slot`'s filter.
+
+        '''
+        try:
+            main_data.loc[self.get_filter(main_data),
+                          'time_slot'] = self.slot_name
+            return main_data
+        except:
+            main_data['time_slot'] = np.nan
+            main_data.loc[self.get_filter(main_data),
+                          'time_slot'] = self.slot_name
+            return main_data
+
+
+class day_of_year_window():
+    '''
+    Class that is used to label the observations in the `main_data` DataFrame 
+    (that contains all the raw data from the RITIS speeds database) according 
+    to the day of the year. For example: some analyses require only data between 
+    September and October.
+    ''' 
+    def __init__(self,start_date,end_date,include_start, include_end, 
+                 inside_outside,window_name):
+        '''
+        Instantiates `day_of_year_window`.
+        
+        Parameters
+        ----------
+        start_date : INT
+            Integer that indicates the day_of_year for the window's start date
+        end_date : INT
+            Integer that indicates the day_of_year for the window's end date
+        include_start : BOOL
+            Indicates whether to use >= or just > for start_date
+        include_end : BOOL
+            Indicates whether to use <= or just < for end_date
+        inside_outside : STR
+            Indicates whether the window refers to the days inside or outside
+            of the start and end dates. To be more specific:
+                If inside_outside=="inside", then the window refers to the 
+                time AFTER start_date but BEFORE end_date. 
+                If inside_outside=="outside" , then the time slot refers to the 
+                time BEFORE start_date but AFTER end_date (e.g.: Before January
+                25th and after November 12th). 
+        window_name : STR
+            Describes the name of the window.
+
+        Returns
+        -------
+        The newly-created instance of this class.
+
+        '''
+        self.start_date     = start_date
+        self.end_date       = end_date
+        self.include_start  = include_start
+        self.include_end    = include_end
+        self.inside_outside = inside_outside
+        self.window_name    = window_name
+        
+    
+    def get_filter(self, main_data):
+        '''
+        Gets the filter/mask that indicates which of the INRIX observations belong
+        to this specific date window.
+        
+        Parameters
+        ----------
+        main_data : pd.DataFrame
+            The pandas DataFrame that contains all the raw data from the RITIS
+            website (INRIX/NPMRDS speeds)
+        
+        Returns
+        -------
+        doy_filter : pd.Series (bool)
+            An array of BOOL variables that indicates whether or not each 
+            observation belongs to this specific window. The array has length
+            equal to the number of rows in main_data.
+        '''
+        
+        try:
+            return self.doy_filter
+        except: 
+            day_of_year = main_data['day_of_year']
+            # Same trick as time_slot.get_filter: the include flags pick the
+            # comparison operator, so each bound costs one vectorized compare.
+            op_start = operator.le if self.include_start else operator.lt
+            op_end = operator.le if self.include_end else operator.lt
+            if self.inside_outside == 'inside':
+                this_filter = (op_start(self.start_date, day_of_year) &
+                               op_end(day_of_year, self.end_date))
+            elif self.inside_outside == 'outside':
+                this_filter = (op_start(day_of_year, self.start_date) |
+                               op_end(self.end_date, day_of_year))
+            self.doy_filter = this_filter
+            return self.doy_filter
+        
+    def add_window_data_to_main_data(self, main_data):
+        '''
+        Adds the 'date_window' column to the data and applies the 
+        `day_of_year_window`'s name to the appropriate rows.
+
+        Parameters
+        ----------
+        main_data : pd.DataFrame
+            The pandas DataFrame that contains all the raw data from the RITIS
+            website (INRIX/NPMRDS speeds)
+
+        Returns
+        -------
+        main_data : pd.DataFrame
+            The same DataFrame as was passed in the input. The only difference 
+            is that now, the `day_of_year_window`'s name was applied to the rows 
+            that fall within the `day_of_year_window`'s filter.
+
+        '''
+        try:
+            main_data.loc[self.get_filter(main_data),
+                          'date_window'] = self.window_name
+            return main_data
+        except:
+            main_data['date_window'] = np.nan
+            main_data.loc[self.get_filter(main_data),
+                          'date_window'] = self.window_name
+            return main_data
+
+
+
+# Percentiles calculated for both speed and travel time in every summary
+summary_percentiles = np.array([1, 5, 15, 20, 50, 80, 85, 95, 99],
+                               dtype='float64')
+
+if numba is not None:
+    @numba.njit(parallel=True, cache=True)
+    def _group_percentiles(values, starts, ends, qs, out):
+        '''
+        Numba kernel that computes percentiles for many groups at once.
+        `values` must already be ordered so that each group occupies the
+        contiguous slice `values[starts[g]:ends[g]]`. The percentiles in `qs`
+        (0-100 scale) are written to `out[g, :]` using the same linear
+        interpolation as np.percentile. Groups are processed in parallel.
+        '''
+        for g in numba.prange(starts.shape[0]):
+            seg = np.sort(values[starts[g]:ends[g]])
+            n = seg.shape[0]
+            for j in range(qs.shape[0]):
+                pos = qs[j] * (n - 1) / 100.0
+                lo = int(pos)
+                hi = lo + 1
+                if hi > n - 1:
+                    hi = n - 1
+                frac = pos - lo
+                out[g, j] = seg[lo] + (seg[hi] - seg[lo]) * frac
+
+    # Optional pre-warm: setting PREWARM=1 triggers the compile (or the load
+    # of the cached machine code) at import time on a tiny dummy input, so
+    # the first real pipeline call doesn't absorb the JIT latency.
+    if os.environ.get('PREWARM') == '1':
+        _group_percentiles(np.arange(4, dtype='float64'),
+                           np.array([0], dtype='int64'),
+                           np.array([4], dtype='int64'),
+                           np.array([50.0]),
+                           np.empty((1, 1)))
+
+
+def _calc_summaries_numba(filtered_data, grouping_columns):
+    '''
+    Numba-accelerated equivalent of grouping `filtered_data` by
+    `grouping_columns` and running `calc_summaries` on the result.
+    The data is sorted once so every group becomes a contiguous slice, and
+    the percentile work for all groups is then dispatched to the
+    `_group_percentiles` kernel (one tight parallel loop) instead of going
+    through one Python lambda per group per percentile.
+
+    Parameters
+    ----------
+    filtered_data : pd.DataFrame
+        DataFrame that was already filtered down to the rows belonging to
+        this summary.
+    grouping_columns : list
+        List of column names that will be used to group the data.
+
+    Returns
+    -------
+    grouped_data_summaries : pd.DataFrame
+        Pandas DataFrame containing all of the summary results: means and
+        percentiles for speed and travel time. Same shape, column names and
+        index as the output of `calc_summaries`.
+    '''
+    # Determining which column name to use: minutes or seconds
+    if 'travel_time_minutes' in filtered_data.columns:
+        tt_col = 'travel_time_minutes'
+    else:
+        tt_col = 'travel_time_seconds'
+
+    # Packing the grouping columns into one int64 key per row so a single
+    # integer argsort replaces the multi-column lexicographic sort. Category
+    # codes are reused where available; everything else is factorized once.
+    # Scaled multiplication keeps the packing exact, the same trick used for
+    # the composite dedup key in read_batch_of_raw_data.
+    packed_keys = np.zeros(len(filtered_data), dtype='int64')
+    for this_col in grouping_columns:
+        this_series = filtered_data[this_col]
+        if isinstance(this_series.dtype, pd.CategoricalDtype):
+            col_codes = this_series.cat.codes.to_numpy('int64')
+            n_codes = len(this_series.cat.categories)
+        else:
+            col_codes, col_uniques = pd.factorize(this_series, sort=True)
+            col_codes = col_codes.astype('int64')
+            n_codes = len(col_uniques)
+        packed_keys = packed_keys * max(n_codes, 1) + col_codes
+
+    order = np.argsort(packed_keys, kind='stable')
+    sorted_data = filtered_data.take(order)
+    sorted_keys = packed_keys[order]
+    group_keys = sorted_data[grouping_columns]
+
+    # Finding the row index at which each new group starts: with a single
+    # integer key this is one vectorized compare against the shifted keys
+    is_new_group = np.empty(sorted_keys.shape[0], dtype=bool)
+    if is_new_group.shape[0] > 0:
+        is_new_group[0] = True
+        np.not_equal(sorted_keys[1:], sorted_keys[:-1],
+                     out=is_new_group[1:])
+    starts = np.flatnonzero(is_new_group)
+    ends = np.append(starts[1:], len(sorted_data))
+    counts = ends - starts
+
+    # Each measure is pulled out as its own contiguous 1-D buffer. This is
+    # the column-major layout that matters for the segmented reductions and
+    # the percentile kernel below: every group is a contiguous slice of one
+    # array, so the scans stream through memory instead of striding across
+    # a row-major multi-column block.
+    speed_vals = sorted_data['speed'].to_numpy(dtype='float64')
+    ttime_vals = sorted_data[tt_col].to_numpy(dtype='float64')
+
+    # Means via one segmented reduction per value column
+    speed_means = np.add.reduceat(speed_vals, starts) / counts
+    ttime_means = np.add.reduceat(ttime_vals, starts) / counts
+
+    # Percentiles via the JIT-compiled kernel
+    speed_pctls = np.empty((starts.shape[0], summary_percentiles.shape[0]))
+    ttime_pctls = np.empty((starts.shape[0], summary_percentiles.shape[0]))
+    _group_percentiles(speed_vals, starts, ends,
+                       summary_percentiles, speed_pctls)
+    _group_percentiles(ttime_vals, starts, ends,
+                       summary_percentiles, ttime_pctls)
+
+    # Rebuilding the same index that `groupby(grouping_columns).agg` produces
+    key_rows = group_keys.iloc[starts]
+    if len(grouping_columns) == 1:
+        summaries_index = pd.Index(key_rows.iloc[:, 0])
+    else:
+        summaries_index = pd.MultiIndex.from_frame(key_rows)
+
+    summary_values = {'count_obs': counts, 'speed_avg': speed_means}
+    for j, this_q in enumerate(summary_percentiles):
+        summary_values[f'speed_{int(this_q):02d}p'] = speed_pctls[:, j]
+    summary_values['ttime_avg'] = ttime_means
+    for j, this_q in enumerate(summary_percentiles):
+        summary_values[f'ttime_{int(this_q):02d}p'] = ttime_pctls[:, j]
+
+    grouped_data_summaries = pd.DataFrame(summary_values,
+                                          index=summaries_index)
+
+    return grouped_data_summaries
+
+
+# Function used to calculate summaries for grouped data
+def calc_summaries(grouped_data):
+    '''
+    Calculates all the important summaries for means and percentiles.
+
+    Parameters
+    ----------
+    grouped_data : DataFrameGroupBy object
+        DataFrame that was filtered down and grouped using the `groupby` function.
+
+    Returns
+    -------
+    grouped_data_summaries : pd.DataFrame
+        Pandas DataFrame containing all of the summary results: means and 
+        percentiles for speed and travel time.
+
+    '''
+    # Determining which column name to use: minutes or seconds. Checking
+    # .obj (the underlying DataFrame) is a plain attribute lookup, whereas
+    # .head() would iterate the first rows of every group just to learn the
+    # column names.
+    if 'travel_time_minutes' in grouped_data.obj.columns:
+        tt_col = 'travel_time_minutes'
+    else:
+        tt_col = 'travel_time_seconds'
+    
+    # Means dispatch straight to pandas' Cython aggregators.
+    grouped_data_summaries = grouped_data.agg(
+        speed_avg = pd.NamedAgg(column='speed', aggfunc='mean'),
+        ttime_avg = pd.NamedAgg(column=tt_col, aggfunc='mean'))
+
+    # Row counts via size(): no column scan at all, and no dependency on
+    # the measurement_tstamp column. (The read path never lets a row
+    # through without a timestamp, so 'count' on it was equivalent.)
+    grouped_data_summaries.insert(0, 'count_obs', grouped_data.size())
+
+    # All nine percentiles for both measures come out of one C-level
+    # groupby.quantile call. The old version registered one Python lambda
+    # per percentile per column — 18 separate passes over every group.
+    pctl_data = (grouped_data[['speed', tt_col]]
+                 .quantile(list(summary_percentiles / 100))
+                 .unstack(level=-1))
+    pctl_data.columns = [
+        ('ttime' if this_col == tt_col else 'speed')
+        + f'_{int(round(this_q * 100)):02d}p'
+        for this_col, this_q in pctl_data.columns]
+
+    grouped_data_summaries = grouped_data_summaries.join(pctl_data)
+
+    # Re-establishing the historical column order: averages first, then the
+    # percentiles for each measure.
+    pctl_suffixes = [f'{int(this_q):02d}p' for this_q in summary_percentiles]
+    grouped_data_summaries = grouped_data_summaries[
+        ['count_obs', 'speed_avg']
+        + [f'speed_{suffix}' for suffix in pctl_suffixes]
+        + ['ttime_avg']
+        + [f'ttime_{suffix}' for suffix in pctl_suffixes]]
+
+    return grouped_data_summaries
+
+
+def calc_summaries_pipeline(main_data,
+                            summary_name,
+                            summary_filter,
+                            grouping_columns):
+    '''
+    This function simplifies and standardizes the process of calculating 
+    summaries from the raw data. The user needs to tell the function what
+    rows are to be kept, what columns will be used to group the data and the 
+    name of this particular summary.
+    This function then returns the newly-calculated summarized data containing
+    a new column called "summary_type".
+
+    Parameters
+    ----------
+    main_data : pd.DataFrame
+        The pandas DataFrame that contains all the raw data from the RITIS
+        website (INRIX/NPMRDS speeds).
+    summary_name : str or None
+        String that describes this summary type. After the `main_data` is
+        summarized, a new column called "summary_type" will be generated.
+        This new column will contain the text stored in the `summary_name`
+        variable. Pass None when "summary_type" is already one of the
+        `grouping_columns` (i.e., several summary types are being computed
+        in one call) and the column should be left as the groupby produced
+        it.
+    summary_filter : np.array or None
+        Array containing only boolean values (False/True). This indicates which
+        rows from the `main_data` should be used in the calculation of these
+        summaries. Pass None to use every row; that skips the filtering copy
+        entirely (cheaper than an all-True mask).
+    grouping_columns : list
+        List of column names that will be used to group the `main_data`
+        dataset
+
+    Returns
+    -------
+    summarized_data : pd.DataFrame
+        Pandas DataFrame containing all of the summary results: means and 
+        percentiles for speed and travel time.
+
+    '''
+    # When numba is available, the percentile work for all groups runs in one
+    # JIT-compiled parallel kernel. The pandas groupby/agg path is kept as a
+    # fallback and produces identical output.
+    # Only the grouping keys and the two measure columns feed the
+    # aggregation, so the filtered copy is restricted to them; copying the
+    # full width of main_data here would move several times the bytes the
+    # groupby actually reads.
+    tt_col = ('travel_time_minutes'
+              if 'travel_time_minutes' in main_data.columns
+              else 'travel_time_seconds')
+    needed_columns = list(grouping_columns) + ['speed', tt_col]
+
+    # summary_filter=None means "keep everything": no mask to AND, no
+    # filtered copy of the frame to materialize.
+    if summary_filter is None:
+        filtered_data = main_data[needed_columns]
+    else:
+        filtered_data = main_data.loc[summary_filter, needed_columns]
+
+    if numba is not None:
+        summarized_data = _calc_summaries_numba(filtered_data,
+                                                grouping_columns)
+    else:
+        # observed=True keeps the groupby restricted to the category
+        # combinations that actually occur, since tmc_code is categorical
+        grouped_data = filtered_data.groupby(grouping_columns,
+                                             observed=True)
+
+        summarized_data = calc_summaries(grouped_data)
+
+    if summary_name is not None:
+        summarized_data['summary_type'] = summary_name
+
+    return summarized_data
+
+
+
+
+@functools.lru_cache(maxsize=4)
+def _load_npmrds(npmrds_geodata_path):
+    '''
+    Reads and caches the NPMRDS shapefile. The same shapefile typically gets
+    requested several times per run (once for the summary data and once for
+    the reliability data), so the parsed GeoDataFrame is kept in a small
+    module-level LRU cache keyed by the path.
+
+    Parameters
+    ----------
+    npmrds_geodata_path : STR
+        String describing the full path to the ".shp" file on disk of where the
+        NPMRDS data can be found.
+
+    Returns
+    -------
+    npmrds_geodata : gpd.GeoDataFrame
+        The GeoDataFrame with the actual geodata from the NPMRDS shapefile.
+    '''
+
+    # On-disk cache of the parsed GeoDataFrame, kept next to the shapefile.
+    # The geometry join downstream is keyed on tmc_code (an attribute join,
+    # not a spatial one), so the win here is skipping the shapefile parse
+    # entirely on repeated runs: unpickling the frame is much cheaper than
+    # re-reading the .shp. The cache is only used for plain local files (not
+    # e.g. "zip://..." URIs) and is invalidated when the shapefile is newer.
+    cache_path = None
+    if os.path.isfile(npmrds_geodata_path):
+        cache_path = npmrds_geodata_path + '.parsed.pkl'
+        if (os.path.isfile(cache_path) and
+                os.path.getmtime(cache_path) >=
+                os.path.getmtime(npmrds_geodata_path)):
+            return pd.read_pickle(cache_path)
+
+    npmrds_geodata = gpd.read_file(npmrds_geodata_path).rename({'Tmc':'tmc_code'},
+                                                               axis=1)
+
+    if cache_path is not None:
+        # Best effort: a read-only folder shouldn't break the pipeline
+        try:
+            npmrds_geodata.to_pickle(cache_path)
+        except OSError:
+            pass
+
+    return npmrds_geodata
+
+
+def read_npmrds_geodata(npmrds_geodata_path):
+    '''
+    Reads in the shapefile associated with the NPMRDS data. Typically, this
+    file is just called "Texas.shp"
+
+    Parameters
+    ----------
+    npmrds_geodata_path : STR
+        String describing the full path to the ".shp" file on disk of where the
+        NPMRDS data can be found.
+
+    Returns
+    -------
+    npmrds_geodata : gpd.GeoDataFrame
+        The GeoDataFrame with the actual geodata from the NPMRDS shapefile.
+    '''
+
+    npmrds_geodata = _load_npmrds(npmrds_geodata_path)
+
+    return npmrds_geodata
+
+
+
+
+def make_simplified_links(tmc_data):
+    '''
+    Creates the simplified link geometries (straight lines) using the
+    start/end long/lat data from the original INRIX TMC data. All the lines
+    are built in one vectorized shapely call from a contiguous coordinate
+    array, instead of constructing Points/LineStrings row by row in Python.
+
+    Parameters
+    ----------
+    tmc_data : pd.DataFrame
+        DataFrame carrying 'start_longitude', 'start_latitude',
+        'end_longitude' and 'end_latitude' columns (one row per link).
+
+    Returns
+    -------
+    link_lines : np.ndarray of shapely.LineString
+        One straight-line geometry per input row.
+
+    '''
+    link_coords = np.empty((len(tmc_data), 2, 2), dtype='float64')
+    link_coords[:, 0, 0] = tmc_data['start_longitude'].to_numpy()
+    link_coords[:, 0, 1] = tmc_data['start_latitude'].to_numpy()
+    link_coords[:, 1, 0] = tmc_data['end_longitude'].to_numpy()
+    link_coords[:, 1, 1] = tmc_data['end_latitude'].to_numpy()
+    return shapely.linestrings(link_coords)
+
+def add_geometries_to_summaries(summarized_data,
+                                main_tmc_data,
+                                npmrds_geodata_path='',
+                                npmrds_gdf=None):
+    '''
+    Adds a column called "geom_final" to the dataset. This new column contains
+    a geometry for each row in the summary dataset. This geometry is generated
+    in one of two different ways, in the following priority:
+        -Look in the NPMRDS shapefile to try and find a link with matching TMC
+        -If we can't find one, we just draw a straight line from the lat/lon
+            data that is found in the TMC_Identification.csv files.
+
+    Parameters
+    ----------
+    summarized_data : pd.DataFrame
+        Pandas DataFrame that contains the speed summaries.
+    main_tmc_data : pd.DataFrame
+        Pandas DataFrame that contains the associated TMC data for all the
+        TMC segments (i.e., the data from all the "TMC_Identification.csv" files)
+    npmrds_geodata_path : STR
+        String that identifies where to find the NPMRDS shapefile. Needs to
+        point to the ".shp" file. Typically, this file is just called "Texas.shp"
+    npmrds_gdf : gpd.GeoDataFrame
+        Already-loaded NPMRDS GeoDataFrame (e.g., from `read_npmrds_geodata`).
+        When provided, this is used directly and `npmrds_geodata_path` is
+        ignored, which avoids re-reading the shapefile from disk when this
+        function gets called multiple times. The default is None.
+
+    Returns
+    -------
+    summarized_data_with_geoms : gpd.GeoDataFrame
+        GeoDataFrame containing the geometries associated with each link.
+
+    '''
+
+    if npmrds_gdf is not None:
+        npmrds_geodata = npmrds_gdf
+    else:
+        npmrds_geodata = _load_npmrds(npmrds_geodata_path)
+
+    # Attaching the NPMRDS geometries with a plain dict lookup. Since only a
+    # single geometry column has to be brought over, a Series.map against a
+    # precomputed tmc_code -> geometry dict is cheaper than a join: no hash
+    # table over both frames, no sort, and no intermediate merge result.
+    # The reprojection and the lookup dict are cached in the GeoDataFrame's
+    # attrs: this function runs at least twice per pipeline run (summaries,
+    # then reliability) against the same cached GeoDataFrame, and to_crs
+    # costs a full PROJ transform over every vertex in the state.
+    geom_by_tmc = npmrds_geodata.attrs.get('geom_by_tmc_4326')
+    if geom_by_tmc is None:
+        # The equivalent of merge(validate='many_to_one'): several shapes
+        # for one TMC would silently collapse to whichever comes last in
+        # the dict, so duplicated codes fail loudly instead.
+        duplicated_tmcs = npmrds_geodata['tmc_code'].duplicated()
+        if duplicated_tmcs.any():
+            raise ValueError(
+                'The NPMRDS geodata contains more than one geometry for '
+                'the following TMC codes: '
+                f'{npmrds_geodata.loc[duplicated_tmcs, "tmc_code"].unique().tolist()}')
+        npmrds_geoms = (npmrds_geodata[['tmc_code','geometry']]
+                        .to_crs('epsg:4326'))
+        geom_by_tmc = dict(zip(npmrds_geoms['tmc_code'].values,
+                               npmrds_geoms['geometry'].values))
+        npmrds_geodata.attrs['geom_by_tmc_4326'] = geom_by_tmc
+    summarized_data_with_geoms = summarized_data.copy()
+    summarized_data_with_geoms['geometry'] = (
+        summarized_data_with_geoms['tmc_code'].map(geom_by_tmc))
+    
+    # Generating the simplified straight-line geometries. The endpoints come
+    # straight from the TMC attribute table, which already holds one row per
+    # (data_origin, tmc_code): deduplicating that small frame is far cheaper
+    # than deduplicating and sorting the full summaries frame and merging the
+    # coordinates back in.
+    temp_geoms = (main_tmc_data[['tmc_code',
+                                 'data_origin',
+                                 'start_latitude',
+                                 'start_longitude',
+                                 'end_latitude',
+                                 'end_longitude']]
+                  .drop_duplicates(subset=['data_origin','tmc_code'],
+                                   ignore_index=True))
+
+    temp_geoms['geometry_simplified'] = make_simplified_links(temp_geoms)
+
+    # Attaching the simplified geometries with the same dict-map pattern as
+    # the NPMRDS geometries above: bringing over a single column doesn't
+    # justify the full merge machinery (hash tables over both frames plus a
+    # rebuilt result frame).
+    simplified_by_key = dict(zip(zip(temp_geoms['data_origin'],
+                                     temp_geoms['tmc_code']),
+                                 temp_geoms['geometry_simplified']))
+    summary_keys = pd.MultiIndex.from_frame(
+        summarized_data_with_geoms[['data_origin','tmc_code']])
+    summarized_data_with_geoms['geometry_simplified'] = (
+        summary_keys.map(simplified_by_key))
+    
+    
+    # Filter that indicates which observations/rows did not have an
+    # associated geometry in the NPMRDS geodata.
+    null_geoms_filter = (summarized_data_with_geoms['geometry']
+                         .isnull().to_numpy())
+
+    # Populating the `geom_final` column with either the geometry found in the NPMRDS
+    # geodata (preferred), or with the simplified geometry created above (fallback).
+    # One np.where pass over the mask replaces the assign-then-patch pair of
+    # fancy-indexed writes.
+    summarized_data_with_geoms['geom_final'] = np.where(
+        null_geoms_filter,
+        summarized_data_with_geoms['geometry_simplified'].to_numpy(),
+        summarized_data_with_geoms['geometry'].to_numpy())
+
+    # Populating the `geom_final_type` column with a flag that shows what type of
+    # geometry is in the `geom_final` column.
+    # If `geom_final_type`== 'original_tmc_shape', then the geometry in
+    # `geom_final` represents the original NPMRDS geometry.
+    # If `geom_final_type`== 'simplified_tmc_shape', then the geometry in
+    # `geom_final` represents the simplified geometry we created in this script
+    # just a few lines above. The flag doubles as the category code, so the
+    # column is one int8 per row instead of one string reference per row.
+    summarized_data_with_geoms['geom_final_type'] = pd.Categorical.from_codes(
+        null_geoms_filter.astype('int8'),
+        categories=['original_tmc_shape','simplified_tmc_shape'])
+    
+    summarized_data_with_geoms = gpd.GeoDataFrame(
+        summarized_data_with_geoms.drop(['geometry','geometry_simplified']
+                                        ,axis=1),
+        crs='epsg:4326',geometry='geom_final')
+    
+    # Extracting the WKT data. Useful for exporting to CSV. Going straight
+    # to shapely's vectorized to_wkt skips the GeoSeries wrapper, and six
+    # decimal places (~10 cm) caps the string length: the WKT column is a
+    # large share of the CSV export's bytes.
+    summarized_data_with_geoms['geom_wkt'] = shapely.to_wkt(
+        np.asarray(summarized_data_with_geoms['geom_final'].values),
+        rounding_precision=6)
+    
+    # Exporting final data to disk
+    #summarized_data_with_geoms.to_file(main_data_geoms_filename,driver='GPKG',layer='main')    
+
+    return summarized_data_with_geoms
+    
+def define_standard_fhwa_timeslots(main_data):
+    '''
+    Adds timeslot and date window columns to `main_data`. These are the 
+    standard timeslots used for the FHWA reliability computations:
+        -AM Peak:   Between 06am and 10am
+        -Mid-day:   Between 10am and 04pm
+        -PM Peak:   Between 04pm and 08pm
+        -Overnight: Between 08pm and 06am
+    
+    Parameters
+    ----------
+    main_data : pd.DataFrame
+        Input DataFrame containing raw speed data for all links.
+
+    Returns
+    -------
+    main_data : pd.DataFrame
+        DataFrame containing raw speed data for all links. 
+        After this function is executed, the following columns get added:
+            -"time_slot"
+            -"date_window"
+
+    '''
+    
+    # Defensive normalization: the standard read path already delivers these
+    # label columns as categoricals, but a frame loaded some other way (e.g.
+    # from a plain CSV export) carries them as object-dtype strings, which
+    # makes every downstream isin/groupby hash Python strings row by row.
+    for this_col in ('tmc_code', 'data_origin', 'road'):
+        if (this_col in main_data.columns
+                and main_data[this_col].dtype == object):
+            main_data[this_col] = main_data[this_col].astype('category')
+
+    # Same idea for the measure columns: the read path delivers float32
+    # (2-3 significant digits of source data), but a float64 frame from
+    # another route would double the bytes moved by every mean/percentile
+    # pass downstream.
+    for this_col in ('speed', 'travel_time_seconds', 'travel_time_minutes'):
+        if (this_col in main_data.columns
+                and main_data[this_col].dtype == np.float64):
+            main_data[this_col] = main_data[this_col].astype(np.float32)
+
+    # Creating the thresholds for the definitions of peak and off-peak time slots
+    # and finding the observations that fall in each category/time slot.
+    # Time slots used are:
+    #    -AM Peak:   Between 06am and 10am
+    #    -Mid-day:   Between 10am and 04pm
+    #    -PM Peak:   Between 04pm and 08pm
+    #    -Overnight: Between 08pm and 06am
+
+    # The time-slot boundaries above, expressed in minutes of the day. The
+    # labels array has one extra entry because minutes before 06am and minutes
+    # from 08pm onwards both land in the "overnight" slot.
+    timeslot_edges = np.array([6*60, 10*60, 16*60, 20*60], dtype='int64')
+    timeslot_labels = np.array(['overnight', 'am_peak', 'midday',
+                                'pm_peak', 'overnight'])
+
+    # Bucketing every observation in one vectorized pass: the minutes-of-day
+    # values are assigned to their slot with a single np.searchsorted call.
+    # This avoids per-row comparisons against Python datetime.time objects,
+    # which used to dominate this step on multi-million-row inputs. The
+    # minute_of_day column from fix_datetime_columns is reused when present
+    # rather than re-derived from the timestamps.
+    if 'minute_of_day' in main_data.columns:
+        minutes_of_day = main_data['minute_of_day'].to_numpy()
+    else:
+        minutes_of_day = (main_data['measurement_tstamp'].values
+                          .astype('datetime64[m]')
+                          .view('int64') % (24*60))
+    main_data['time_slot'] = pd.Categorical(
+        timeslot_labels[np.searchsorted(timeslot_edges, minutes_of_day,
+                                        side='right')],
+        categories=['am_peak', 'midday', 'pm_peak', 'overnight'])
+
+    # Creating the thresholds for the definitions of day-of-year windows and finding
+    # the observations that fall in each category/window.
+    # The windows used are:
+    #    -All days: Between Jan 1, 2019 and Dec 31, 2019
+    # Note: Currently, there is only one category that spans the entire year. 
+    #       The functionality was built in for future projects, when we might want 
+    #       to compare, say, speeds during the four seasons. 
+    
+    all_days_window = day_of_year_window(start_date=pd.to_datetime('Jan 1, 2019').day_of_year, 
+                                         end_date=pd.to_datetime('Dec 31, 2019').day_of_year, 
+                                         include_start = True, 
+                                         include_end = True,
+                                         inside_outside = 'inside',
+                                         window_name = 'all_days')
+    
+    main_data = all_days_window.add_window_data_to_main_data(main_data)
+
+    # Same treatment as time_slot: a handful of labels repeated over millions
+    # of rows is much cheaper stored as a categorical.
+    main_data['date_window'] = main_data['date_window'].astype('category')
+
+    return main_data
+
+
+def filter_group_summarize_fhwa(main_data):
+    '''
+    Defines the standard periods and summaries needed for calculating the 
+    FHWA reliability values.
+    To see the formal definitions of these periods, see CFR 23 490.511 and 
+    CFR 23 490.611:
+        https://www.ecfr.gov/current/title-23/chapter-I/subchapter-E/part-490/subpart-E/section-490.511
+        https://www.ecfr.gov/current/title-23/chapter-I/subchapter-E/part-490/subpart-F/section-490.611
+        https://www.law.cornell.edu/cfr/text/23/490.511
+        https://www.law.cornell.edu/cfr/text/23/490.611
+
+    Parameters
+    ----------
+    main_data : pd.DataFrame
+        Input dataframe containing raw speed data for every time period. 
+        It is expected that this dataframe will contain the following columns:
+            -"time_slot"
+            -"date_window"
+            -"day_of_week"
+            -"day_of_year"
+
+    Returns
+    -------
+    all_summaries_concat : pd.DataFrame
+        DataFrame that contains all the standard summary data required for 
+        FHWA's reliability calculations.
+
+    '''
+    
+    # The six standard FHWA summary buckets. Each entry pairs the summary
+    # name with the boolean mask that picks its rows:
+    #    -am_peak/midday/pm_peak: the matching time slot, weekdays only
+    #    -overnight:              the overnight slot, all days
+    #    -weekends:               the 6am-to-8pm slots, Saturdays and Sundays
+    #    -alltime:                every observation (mask None = no filter)
+    # TODO: Need to find a more user-friendly way to define these filters
+
+    # The predicates run on the categories' integer codes: comparing small
+    # int arrays keeps the mask builds in tight SIMD-friendly NumPy loops,
+    # with no per-row string hashing (which is what Series.isin over the
+    # labels would cost).
+    time_slot_codes = main_data['time_slot'].cat.codes.to_numpy()
+    slot_code = main_data['time_slot'].cat.categories.get_loc
+    date_window_filter = (main_data['date_window'].cat.codes.to_numpy()
+                          == main_data['date_window'].cat.categories
+                                                    .get_loc('all_days'))
+    day_of_week_codes = main_data['day_of_week'].to_numpy()
+    # Monday-Friday are 0-4, so a single threshold compare covers each set
+    # without the hash lookups np.isin does per element
+    weekday_filter = day_of_week_codes < 5
+    weekend_filter = day_of_week_codes >= 5
+
+    summary_buckets = [
+        ('am_peak',   ((time_slot_codes == slot_code('am_peak'))
+                       & date_window_filter & weekday_filter)),
+        ('midday',    ((time_slot_codes == slot_code('midday'))
+                       & date_window_filter & weekday_filter)),
+        ('pm_peak',   ((time_slot_codes == slot_code('pm_peak'))
+                       & date_window_filter & weekday_filter)),
+        ('overnight', ((time_slot_codes == slot_code('overnight'))
+                       & date_window_filter)),
+        ('weekends',  (np.isin(time_slot_codes, [slot_code('am_peak'),
+                                                 slot_code('midday'),
+                                                 slot_code('pm_peak')])
+                       & date_window_filter & weekend_filter)),
+        ('alltime',   None),
+    ]
+
+    # A row can belong to several buckets (at minimum its own slot plus
+    # 'alltime'), so the buckets are stacked: the row positions for every
+    # bucket are gathered with one take(), tagged with a categorical
+    # summary_type column, and summarized with a SINGLE groupby that has
+    # summary_type as the leading key. The old version instead ran the whole
+    # filter/groupby/percentile machinery six times over main_data; for a
+    # memory-bound aggregation, one pass over the stacked rows is far
+    # cheaper than six passes over everything.
+    bucket_row_ids = [np.arange(len(main_data)) if this_mask is None
+                      else np.flatnonzero(this_mask)
+                      for _, this_mask in summary_buckets]
+
+    # The stacked frame only needs the grouping keys and the two measure
+    # columns; taking the full-width frame would roughly double main_data's
+    # footprint for columns the aggregation never reads.
+    tt_col = ('travel_time_minutes'
+              if 'travel_time_minutes' in main_data.columns
+              else 'travel_time_seconds')
+    stacked_data = (main_data[['data_origin','tmc_code','speed',tt_col]]
+                    .take(np.concatenate(bucket_row_ids)))
+    stacked_data['summary_type'] = pd.Categorical.from_codes(
+        np.repeat(np.arange(len(summary_buckets), dtype='int8'),
+                  [len(these_ids) for these_ids in bucket_row_ids]),
+        categories=[this_name for this_name, _ in summary_buckets])
+
+    # Columns used to group data for summaries
+    grouping_columns = ['summary_type','data_origin','tmc_code']
+
+    # Calculating all six summaries in one shot. The category order of
+    # summary_type matches the old per-bucket execution order, so the
+    # concatenated output rows come back in the same order as before.
+    # There is deliberately no task-level parallelism over the buckets here:
+    # since they all collapsed into this one groupby, the heavy lifting is a
+    # single pass whose percentile kernel already runs multithreaded when
+    # numba is available (see _group_percentiles).
+    all_summaries_concat = calc_summaries_pipeline(
+        main_data=stacked_data,
+        summary_name=None,
+        summary_filter=None,
+        grouping_columns=grouping_columns)
+
+    all_summaries_concat = all_summaries_concat.reset_index()
+
+    return all_summaries_concat
+
+# Data origins and summary types that participate in each FHWA reliability
+# metric. Mixed traffic uses the 80th/50th travel time percentile ratio over
+# four periods; trucks use the 95th/50th ratio and also include "overnight".
+_MIXED_TRAFFIC_ORIGINS = ['inrix', 'npmrds_from_inrix_trucks_and_passveh']
+_TRUCK_ORIGIN = 'npmrds_from_inrix_trucks'
+_MIXED_TRAFFIC_SUMMARY_TYPES = ['am_peak', 'midday', 'pm_peak', 'weekends']
+_TRUCK_SUMMARY_TYPES = ['am_peak', 'midday', 'pm_peak', 'overnight',
+                        'weekends']
+
+def _accepted_codes_mask(this_col, accepted_values):
+    '''
+    Boolean membership mask for `this_col` against `accepted_values`.
+    For categorical columns the acceptance is resolved once per category
+    and the per-row mask becomes a single table gather over the integer
+    codes, instead of a hash-set isin over the full column. Non-categorical
+    columns fall back to plain isin.
+
+    Parameters
+    ----------
+    this_col : pd.Series
+        Column to test.
+    accepted_values : list
+        Values that should map to True.
+
+    Returns
+    -------
+    np.ndarray
+        Boolean array with one entry per row of `this_col`.
+    '''
+    if isinstance(this_col.dtype, pd.CategoricalDtype):
+        # The trailing False catches missing values, whose code is -1
+        accept = np.append(
+            this_col.cat.categories.isin(accepted_values), False)
+        return accept[this_col.cat.codes.to_numpy()]
+    return this_col.isin(accepted_values).to_numpy()
+
+def _calc_lottr_reliability_table(all_summaries_concat):
+    '''
+    Computes the Level of Travel Time Reliability (LOTTR) aggregates for the
+    mixed traffic and truck metrics in a single pass. Both metrics follow
+    the same recipe (a percentile ratio per summary period, then
+    sum/count/max per TMC segment), so the relevant rows for both are
+    selected up front, the appropriate ratio is picked per row, and one
+    groupby produces the aggregates that the two public reliability
+    functions then slice by data origin.
+
+    Parameters
+    ----------
+    all_summaries_concat : pd.DataFrame
+        Dataframe containing all of the summary data needed for the
+        computation of the reliability metrics.
+
+    Returns
+    -------
+    rel_table : pd.DataFrame
+        One row per (tmc_code, data_origin) with the RawDataRows,
+        SummaryCount and Reliability columns for both metrics.
+    '''
+    summary_type = all_summaries_concat['summary_type']
+    data_origin = all_summaries_concat['data_origin']
+
+    # Rows that belong to either metric. The truck metric additionally
+    # accepts the "overnight" summaries.
+    keep_mixed = (_accepted_codes_mask(summary_type,
+                                       _MIXED_TRAFFIC_SUMMARY_TYPES)
+                  & _accepted_codes_mask(data_origin,
+                                         _MIXED_TRAFFIC_ORIGINS))
+    keep_truck = (_accepted_codes_mask(summary_type, _TRUCK_SUMMARY_TYPES)
+                  & _accepted_codes_mask(data_origin, [_TRUCK_ORIGIN]))
+    rel_data = all_summaries_concat.loc[
+        keep_mixed | keep_truck,
+        ['tmc_code', 'data_origin', 'count_obs',
+         'ttime_50p', 'ttime_80p', 'ttime_95p']]
+
+    # Level of Travel Time Reliability: 95th/50th percentile ratio for
+    # trucks, 80th/50th for mixed traffic
+    rel_data['LOTTR'] = np.where(
+        (rel_data['data_origin'] == _TRUCK_ORIGIN).to_numpy(),
+        rel_data['ttime_95p'].to_numpy() / rel_data['ttime_50p'].to_numpy(),
+        rel_data['ttime_80p'].to_numpy() / rel_data['ttime_50p'].to_numpy())
+
+    # One aggregation pass covering both metrics
+    rel_table = (rel_data
+        .groupby(['tmc_code','data_origin'], observed=True)
+        .agg(
+            RawDataRows = pd.NamedAgg(column='count_obs',
+                                       aggfunc='sum'),
+            SummaryCount = pd.NamedAgg(column='LOTTR',
+                                       aggfunc='count'),
+            Reliability = pd.NamedAgg(column='LOTTR',
+                                                   aggfunc='max'))
+        .reset_index())
+
+    return rel_table
+
+def calculate_standard_reliabily_mixed_traffic(all_summaries_concat,
+                                               rel_table=None):
+    '''
+    Calculates travel time reliability for mixed traffic according to FHWA's 
+    standards. 
+    Note: See "National Performance Measures for Congestion, Reliability, and 
+    Freight, and CMAQ Traffic Congestion":
+        https://www.fhwa.dot.gov/tpm/guidance/
+        https://www.fhwa.dot.gov/tpm/guidance/hif18040.pdf
+    
+    Parameters
+    ----------
+    all_summaries_concat : pd.DataFrame
+        Dataframe containing all of the summary data needed for the computation
+        of the reliability metrics. 
+    rel_table : pd.DataFrame, optional
+        Precomputed output of `_calc_lottr_reliability_table`. Callers that
+        need both the mixed traffic and the truck metrics can compute the
+        table once and pass it to both functions.
+
+    Returns
+    -------
+    reliability_summaries_all : pd.DataFrame
+        Dataframe containing the reliability data for each TMC segment.
+
+    '''
+    # For the mixed traffic data (i.e., for observations where
+    # data_origin is in ['inrix', 'npmrds_from_inrix_trucks_and_passveh']):
+    #    Calculate 80th percentile divided by 50th percentile for four summary
+    #    groups: am_peak, midday, pm_peak, weekends.
+    #    Then, take the highest one of all four. If that value is larger than
+    #    1.5, the segment is deemd "unreliable". Otherwise, the segment is
+    #    deemed "reliable".
+
+    if rel_table is None:
+        rel_table = _calc_lottr_reliability_table(all_summaries_concat)
+
+    # Keeping the mixed traffic aggregates, and dropping TMC segments that
+    # didn't have summaries for all periods needed
+    reliability_summaries_mixed_traffic = (rel_table.loc[
+        rel_table['data_origin'].isin(_MIXED_TRAFFIC_ORIGINS)
+        & (rel_table['SummaryCount'] == 4)]
+        .reset_index(drop=True))
+
+    reliability_summaries_mixed_traffic['Reliability_Type'] = 'Mixed_Traffic'
+
+    # Adding the binary "Reliable" column. 
+    reliability_summaries_mixed_traffic['Reliable'] = (
+        reliability_summaries_mixed_traffic['Reliability'] < 1.5)
+    
+    reliability_summaries_mixed_traffic = (reliability_summaries_mixed_traffic
+                                           [['tmc_code', 'data_origin', 
+                                             'Reliability_Type', 'RawDataRows', 
+                                             'SummaryCount', 'Reliability',
+                                             'Reliable']])
+    
+    return reliability_summaries_mixed_traffic
+
+def calculate_standard_reliability_trucks(all_summaries_concat,
+                                          rel_table=None):
+    '''
+    Calculates truck travel time reliability according to FHWA's standards. 
+    Note: See "National Performance Measures for Congestion, Reliability, and 
+    Freight, and CMAQ Traffic Congestion":
+        https://www.fhwa.dot.gov/tpm/guidance/
+        https://www.fhwa.dot.gov/tpm/guidance/hif18040.pdf
+        
+    Parameters
+    ----------
+    all_summaries_concat : pd.DataFrame
+        Dataframe containing all of the summary data needed for the computation
+        of the reliability metrics. 
+    rel_table : pd.DataFrame, optional
+        Precomputed output of `_calc_lottr_reliability_table`. Callers that
+        need both the mixed traffic and the truck metrics can compute the
+        table once and pass it to both functions.
+
+    Returns
+    -------
+    reliability_summaries_all : pd.DataFrame
+        Dataframe containing the reliability data for each TMC segment.
+
+    '''
+    # For truck traffic (data_origin='npmrds_from_inrix_trucks'):
+    #    Calculate 95th percentile divided by 50th percentile for the five
+    #    summary groups: am_peak, midday, pm_peak, overnight and weekends.
+    #    Then, just take the maximum of those five values.
+    #
+    # Note: Please note that, for trucks, we also have to analyze the
+    #       "overnight" summary, which is absent in the mixed traffic
+    #       summaries.
+
+    if rel_table is None:
+        rel_table = _calc_lottr_reliability_table(all_summaries_concat)
+
+    # Keeping the truck aggregates, and dropping TMC segments that didn't
+    # have summaries for all periods needed
+    reliability_summaries_truck_traffic = (rel_table.loc[
+        (rel_table['data_origin'] == _TRUCK_ORIGIN)
+        & (rel_table['SummaryCount'] == 5)]
+        .reset_index(drop=True))
+
+    reliability_summaries_truck_traffic['Reliability_Type'] = 'Truck_Traffic'
+
+    # Adding the binary "Reliable" column. 
+    reliability_summaries_truck_traffic['Reliable'] = (
+        reliability_summaries_truck_traffic['Reliability'] < 1.5)
+    
+    reliability_summaries_truck_traffic = (reliability_summaries_truck_traffic
+                                           [['tmc_code', 'data_origin', 
+                                             'Reliability_Type', 'RawDataRows', 
+                                             'SummaryCount', 'Reliability',
+                                             'Reliable']])
+    
+    return reliability_summaries_truck_traffic
+
+def calculate_standard_reliabilities(all_summaries_concat, 
+                                     main_data, 
+                                     main_tmc_data,
+                                     calc_mixed_traf_rel=True,
+                                     calc_truck_rel=True):
+    '''
+    Calculates the overall Reliability according to FHWA's standards. 
+    Note: See "National Performance Measures for Congestion, Reliability, and 
+    Freight, and CMAQ Traffic Congestion":
+        https://www.fhwa.dot.gov/tpm/guidance/
+        https://www.fhwa.dot.gov/tpm/guidance/hif18040.pdf
+
+    Parameters
+    ----------
+    all_summaries_concat : pd.DataFrame
+        Dataframe containing all of the summary data needed for the computation
+        of the reliability metrics. 
+    main_data : pd.DataFrame
+        Input dataframe containing raw speed data for every time period. 
+    main_tmc_data : pd.DataFrame
+        Pandas DataFrame that contains the associated TMC data for all the TMC
+        segments (i.e., the data from all the "TMC_Identification.csv" files)
+    calc_mixed_traf_rel : boolean
+        Flag that signals whether or not to calculate reliability for mixed 
+        traffic
+    calc_truck_rel : boolean
+        Flag that signals whether or not to calculate reliability for trucks
+
+    Returns
+    -------
+    reliability_summaries_all : pd.DataFrame
+        Dataframe containing the reliability data for each TMC segment.
+
+    '''
+    # Calculating overall Reliability. 
+    
+    # For the mixed traffic data (data_origin='npmrds_from_inrix_trucks_and_passveh'):
+    #    Calculate 80th percentile divided by 50th percentile for four summary 
+    #    groups: am_peak, midday, pm_peak, weekends.
+    #    Then, take the highest one of all four. If that value is larger than 1.5, 
+    #    the segment is deemed "unreliable". Otherwise, the segment is deemed "reliable".
+    
+    # For truck traffic (data_origin='npmrds_from_inrix_trucks'):
+    #    Calculate 95th percentile divided by 50th percentile for the five summary
+    #    groups: am_peak, midday, pm_peak, overnight and weekends.
+    #    Then, just take the maximum of those five values. 
+    #    Note: For trucks, this is a continuous value, while for mixed traffic the 
+    #    metric is just a binary "reliable"/"unreliable" variable.
+    
+    # List that will store all reliability results
+    reliability_dfs = []
+
+    # Computing the LOTTR aggregates for both metrics in one pass; the
+    # per-metric functions below just slice this table
+    rel_table = _calc_lottr_reliability_table(all_summaries_concat)
+
+    # Calculating reliability for mixed traffic
+    if calc_mixed_traf_rel:
+        reliability_summaries_mixed_traffic = (
+            calculate_standard_reliabily_mixed_traffic(all_summaries_concat,
+                                                       rel_table=rel_table))
+        
+        # Finding missing TMC codes and re-including them
+        missing_tmc_codes_mixed_traf = find_missing_tmc_codes(main_data, 
+                                                   reliability_summaries_mixed_traffic)
+        
+        # Both frames go straight into the list; the single terminal concat
+        # below combines everything in one pass. Nothing missing means no
+        # backfill frame to build at all.
+        reliability_dfs.append(reliability_summaries_mixed_traffic)
+        if missing_tmc_codes_mixed_traf:
+            # Storing the repeated origin label once as a categorical rather
+            # than broadcasting one Python string pointer per missing code
+            this_origin = (
+                reliability_summaries_mixed_traffic['data_origin'].iloc[0])
+            reliability_dfs.append(
+                pd.DataFrame({'tmc_code':missing_tmc_codes_mixed_traf,
+                              'data_origin':pd.Categorical.from_codes(
+                                  np.zeros(len(missing_tmc_codes_mixed_traf),
+                                           dtype=np.int8),
+                                  categories=[this_origin])}))
+    
+    # Calculating reliability for trucks
+    if calc_truck_rel:
+        reliability_summaries_truck_traffic = (
+            calculate_standard_reliability_trucks(all_summaries_concat,
+                                                  rel_table=rel_table))
+        
+        missing_tmc_codes_truck = find_missing_tmc_codes(main_data, 
+                                                   reliability_summaries_truck_traffic)
+        # Finding missing TMC codes and re-including them
+        reliability_dfs.append(reliability_summaries_truck_traffic)
+        if missing_tmc_codes_truck:
+            this_origin = (
+                reliability_summaries_truck_traffic['data_origin'].iloc[0])
+            reliability_dfs.append(
+                pd.DataFrame({'tmc_code':missing_tmc_codes_truck,
+                              'data_origin':pd.Categorical.from_codes(
+                                  np.zeros(len(missing_tmc_codes_truck),
+                                           dtype=np.int8),
+                                  categories=[this_origin])}))
+    
+    # Combining mixed traffic and truck reliability data. A single frame
+    # (one metric requested, no missing codes) is returned as-is instead of
+    # paying the concat machinery for a no-op combine.
+    if len(reliability_dfs) == 1:
+        reliability_summaries_all = reliability_dfs[0]
+    else:
+        reliability_summaries_all = pd.concat(reliability_dfs,
+                                              ignore_index=True, copy=False)
+    
+    return reliability_summaries_all
+
+
+def find_missing_tmc_codes(main_data, ref_data):
+    '''
+    Finds which TMC codes are missing in the `ref_data` from the original raw
+    dataset.
+
+    Parameters
+    ----------
+    main_data : pd.DataFrame
+        Input dataframe containing raw speed data for every time period. 
+    ref_data : pd.DataFrame
+        Reference data whose TMC codes will be checked against the original
+        raw data.
+
+    Returns
+    -------
+    missing_tmc_codes : LIST
+        List of TMC codes that are "missing" from `ref_data` (i.e., they exist
+        in `main_data`, but not in `ref_data`).
+
+    '''
+    # Getting unique TMC codes from both sets. np.asarray flattens the
+    # Categorical that .unique() returns for categorical columns into a
+    # plain array, which is what the set difference below needs.
+    main_data_unique = np.asarray(main_data['tmc_code'].unique())
+    ref_data_unique = np.asarray(ref_data['tmc_code'].unique())
+
+    # Comparing the sets in one vectorized pass: codes that exist in the
+    # main data but not in the reference data
+    missing_tmc_codes = np.setdiff1d(main_data_unique, ref_data_unique,
+                                     assume_unique=True).tolist()
+
+    return missing_tmc_codes
+
+def start_to_finish_fhwa_summaries_and_reliability(
+        input_data_folder='',
+        npmrds_geodata_path='',
+        npmrds_gdf=None,
+        road_str='',
+        chunk_size=100000,
+        export_raw_speed_data=False,
+        output_raw_data_filename_parquet='',
+        export_tmc_data=False,
+        output_tmc_data_filename_parquet='',
+        export_summary_data=False,
+        output_summary_data_filename_gpkg='',
+        export_reliability_data=False,
+        output_reliability_data_filename_gpkg=''):
+    '''
+    Does everything needed to calculate the FHWA reliability metrics from the 
+    zipped raw data files from RITIS. 
+    The several bells and whistles in this function's inputs are just controls
+    of whether or not to export some of the processed datasets to the local disk.
+
+    Parameters
+    ----------
+    input_data_folder : STR
+        String that indicates the folder to be investigated for the zipfiles 
+        containing the raw data
+    npmrds_geodata_path : STR
+        String that identifies where to find the NPMRDS shapefile. Needs to 
+        point to the ".shp" file. Typically, this file is just called "Texas.shp"
+    npmrds_gdf : gpd.GeoDataFrame
+        Already-loaded NPMRDS GeoDataFrame. Useful when the same geodata is
+        shared by several calls to this function (e.g., the multi-year loop):
+        load it once, pass it in, and the internal shapefile reads are
+        skipped entirely. When None (the default), the geodata is loaded
+        from `npmrds_geodata_path`.
+    road_str: STR 
+        String used to filter road segments based on their names. This is also 
+        referred to as "the main searched road" in other places of this script.
+        The TMC segments will be filtered based on whether or not the 'road' 
+        column contains this string. To get the entire dataset back, just use 
+        an empty string ('').
+    chunk_size: INT
+        Integer used to determine number of rows read at a time by Pandas' 
+        read_csv method.
+    export_raw_speed_data : bool
+        Determines whether or not to export the raw speed data to disk. 
+        The default is False.
+    output_raw_data_filename_parquet : STR
+        Full (absolute) path of the Parquet file containing the raw data
+        read in through this function.
+    export_tmc_data : bool
+        Determines whether or not to export the TMC Information data to disk. 
+        The default is False.
+    output_tmc_data_filename_parquet : STR
+        Full (absolute) path of the Parquet file containing the TMC data
+        read in through this function.
+    export_summary_data : bool
+        Determines whether or not to export the summary data to disk. 
+        The default is False.
+    output_summary_data_filename_gpkg : STR
+        String that identifies the path and filename to give to the GeoDataFrame
+        that contains the summary data. This needs to be a GeoPackage
+        file ('.gpkg' extension).
+    export_reliability_data : bool
+        Determines whether or not to export the reliability data to disk. 
+        The default is False.
+    output_reliability_data_filename_gpkg : STR
+        String that identifies the path and filename to give to the GeoDataFrame
+        that contains the reliability data. This needs to be a GeoPackage
+        file ('.gpkg' extension). The default is ''.
+
+    Returns
+    -------
+    output_dict : DICT
+        Dictionary containing four datasets:
+            -main_data: pd.DataFrame that contains all the raw data with the 
+                extra processing columns 
+            -main_tmc_data: pd.DataFrame that contains the TMC information
+                about all the links
+            -all_summaries_with_geoms: gpd.GeoDataFrame that contains all the
+                summary data
+            -reliability_summaries_with_geoms: gpd.GeoDataFrame that contains
+                all the reliability data
+    '''
+    
+    ############################
+    ### STEP 1: READING DATA ###
+    ############################
+    
+    # Actually reading in the whole data and generating the filtered output files
+    all_data = read_batch_of_raw_data(input_data_folder, 
+                                      road_str, 
+                                      chunk_size)
+    
+    # Fishing out the `main_data` and `main_tmc_data` DataFrames.
+    main_data = all_data['main_data']
+    main_tmc_data  = all_data['main_tmc_data']
+
+    # Exporting raw data and TMC information
+    # Parquet with ZSTD column compression is several times smaller on disk
+    # than the pickle files previously written here, and it can be read back
+    # column-by-column (pd.read_parquet with a `columns` argument).
+    if export_raw_speed_data:
+        main_data.to_parquet(output_raw_data_filename_parquet,
+                             engine='pyarrow', compression='zstd',
+                             row_group_size=1_000_000)
+
+    if export_tmc_data:
+        main_tmc_data.to_parquet(output_tmc_data_filename_parquet,
+                                 engine='pyarrow', compression='zstd')
+
+    ###################################################
+    ### STEP 2: PRE-POCESSING COLUMNS FOR FILTERING ###
+    ###################################################
+    
+    # Fixing datetime information: adding time and day_of_week columns
+    main_data = fix_datetime_columns(main_data)
+    
+    # Adding timeslot and date window columns
+    main_data = define_standard_fhwa_timeslots(main_data)
+    
+    ############################################################
+    ### STEP 3: FILTERING, GROUPING AND SUMMARIZING THE DATA ###
+    ############################################################
+    
+    all_summaries_concat = filter_group_summarize_fhwa(main_data)
+
+    # Loading the NPMRDS geodata once (unless the caller already passed in a
+    # loaded GeoDataFrame). Either way, the same GeoDataFrame is reused by
+    # both `add_geometries_to_summaries` calls below, which avoids re-reading
+    # (and re-parsing) the same shapefile from disk.
+    if npmrds_gdf is None:
+        npmrds_gdf = read_npmrds_geodata(npmrds_geodata_path)
+
+    all_summaries_with_geoms = add_geometries_to_summaries(
+                                   summarized_data=all_summaries_concat,
+                                   main_tmc_data=main_tmc_data,
+                                   npmrds_gdf=npmrds_gdf)
+    
+    if export_summary_data:
+        # pyogrio writes the whole layer in bulk through GDAL's C API,
+        # instead of the feature-by-feature Fiona path used by .to_file
+        pyogrio.write_dataframe(all_summaries_with_geoms,
+                                output_summary_data_filename_gpkg,
+                                layer='main', driver='GPKG')
+    
+    ################################################
+    ### STEP 4: CALCULATING RELIABILITY MEASURES ###
+    ################################################
+    
+    reliability_summaries_all = calculate_standard_reliabilities(
+        all_summaries_concat=all_summaries_concat, 
+        main_data=main_data, 
+        main_tmc_data=main_tmc_data,
+        calc_mixed_traf_rel=True,
+        calc_truck_rel=True)
+    
+    reliability_summaries_with_geoms = add_geometries_to_summaries(
+        summarized_data=reliability_summaries_all,
+        main_tmc_data=main_tmc_data,
+        npmrds_gdf=npmrds_gdf)
+
+    if export_reliability_data:
+        pyogrio.write_dataframe(reliability_summaries_with_geoms,
+                                output_reliability_data_filename_gpkg,
+                                layer='main', driver='GPKG')
+
+    output_dict = {'main_data':main_data,
+                   'main_tmc_data':main_tmc_data,
+                   'all_summaries_with_geoms':all_summaries_with_geoms,
+                   'reliability_summaries_with_geoms':reliability_summaries_with_geoms}
+
+    return output_dict
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
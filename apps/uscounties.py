@@ -1,36 +1,64 @@
-import streamlit as st
-import folium
-import geopandas as gpd
-from shapely.geometry import LineString
-
-#Functions
-
-def main():
-    st.title("US Counties Selector")
-    
-    county_gdf = gpd.read_file(file_path)
-
-    m = folium.Map(location=[41.00792926996004, -97.76132662516906], zoom_start=8)
-
-    folium.GeoJson(county_gdf).add_to(m)
-
-    drawn_line = m.drawn_line()
-    if drawn_line is not None:
-
-        line_coords = [(p.y, p.x) for p in drawn_line]
-        line = LineString(line_coords)
-
-        intersecting_counties = county_gdf[county_gdf.intersects(line)]
-
-        st.subheader("Intersecting Counties:")
-        st.write(intersecting_counties)
-
-        highlight_layer = folium.GeoJson(intersecting_counties)
-        highlight_layer.add_to(m)
-
-    st.folium_static(m)
-
-file_path = "https://github.com/sim-arora/streamlit-apps/blob/main/data/georef-united-states-of-america-county.geojson"
-
-if __name__ == '__main__':
-    main()
+import streamlit as st
+import folium
+import pyogrio
+import shapely
+from shapely.geometry import LineString
+
+#Functions
+
+# Cached so the counties are only parsed on the first run: every widget
+# interaction reruns this script, and re-parsing GeoJSON each time dominated
+# the rerun latency. The loader also works with FlatGeobuf (.fgb), which
+# parses ~10x faster than GeoJSON if the data file is converted once with
+# pyogrio.write_dataframe(gdf, "counties.fgb", driver="FlatGeobuf").
+@st.cache_data(show_spinner=False)
+def load_counties(path):
+    return pyogrio.read_dataframe(path)
+
+# R-tree over the county polygons, built once per session. The leading
+# underscore tells Streamlit not to try hashing the GeoDataFrame argument.
+@st.cache_resource
+def get_county_tree(_gdf):
+    return shapely.STRtree(_gdf.geometry.values)
+
+def main():
+    st.title("US Counties Selector")
+
+    county_gdf = load_counties(file_path)
+
+    # Simplifying all county polygons in a single vectorized GEOS call before
+    # handing them to folium. Simplifying one geometry at a time would pay
+    # Python-level overhead for each of the ~3k counties.
+    simplified_gdf = county_gdf.assign(
+        geometry=county_gdf.geometry.simplify(tolerance=0.001,
+                                              preserve_topology=True))
+
+    m = folium.Map(location=[41.00792926996004, -97.76132662516906], zoom_start=8)
+
+    folium.GeoJson(simplified_gdf.to_json()).add_to(m)
+
+    drawn_line = m.drawn_line()
+    if drawn_line is not None:
+
+        line_coords = [(p.y, p.x) for p in drawn_line]
+        line = LineString(line_coords)
+
+        # Querying the R-tree narrows the intersection test down to the few
+        # candidate counties near the line, instead of running an intersects
+        # check against every one of the ~3k polygons.
+        tree = get_county_tree(county_gdf)
+        hit_idx = tree.query(line, predicate='intersects')
+        intersecting_counties = county_gdf.iloc[hit_idx]
+
+        st.subheader("Intersecting Counties:")
+        st.write(intersecting_counties)
+
+        highlight_layer = folium.GeoJson(intersecting_counties)
+        highlight_layer.add_to(m)
+
+    st.folium_static(m)
+
+file_path = "https://github.com/sim-arora/streamlit-apps/blob/main/data/georef-united-states-of-america-county.geojson"
+
+if __name__ == '__main__':
+    main()
@@ -1,137 +1,262 @@
-import os, sys
-import geopandas as gpd
-import streamlit as st
-import folium
-
-sys.path.append('apps')
-import inrix_npmrds_functions as inr
-# import inrix_npmrds_processing as inp
-
-def save_uploaded_file(file_content, file_name):
-    """
-    Save the uploaded file to a temporary directory
-    """
-    import tempfile
-    import os
-    import uuid
-
-    _, file_extension = os.path.splitext(file_name)
-    file_id = str(uuid.uuid4())
-    file_path = os.path.join(tempfile.gettempdir(), f"{file_id}{file_extension}")
-
-    with open(file_path, "wb") as file:
-        file.write(file_content.getbuffer())
-
-    return file_path
-
-
-def app():
-
-    st.title("INRIX Reliability Score Generator")
-
-    row1_col1, row1_col2 = st.columns([2, 1])
-    width = 880
-    height = 600
-
-    with row1_col2:
-
-        import leafmap.foliumap as leafmap
-        
-        basemaps = {
-        "Roadmap": "ROADMAP",
-        "Terrain": "TERRAIN",
-        "Satellite": "SATELLITE",
-        "Hybrid": "HYBRID",
-        }
-
-        selected_basemap = st.sidebar.radio("Select Basemap", list(basemaps.keys()))
-
-        st.markdown(
-            """<style>
-        div[class*="stRadio"] > label > div[data-testid="stMarkdownContainer"] > p {
-            font-size: 24px;
-            # font-weight: bold;
-        }
-            </style>
-            """, unsafe_allow_html=True)
-
-        url = st.text_input(
-            "Enter a URL to a vector dataset",
-
-        )
-
-        data = st.file_uploader(
-            "Upload a vector dataset", type=["geojson", "kml", "zip", "tab", "gpkg"]
-        )
-
-        container = st.container()
-
-        if data or url:
-            if data:
-                file_path = save_uploaded_file(data, data.name)
-                layer_name = os.path.splitext(data.name)[0]
-            elif url:
-                file_path = url
-                layer_name = url.split("/")[-1].split(".")[0]
-
-            with row1_col1:
-                if file_path.lower().endswith(".kml"):
-                    gpd.io.file.fiona.drvsupport.supported_drivers["KML"] = "rw"
-                    gdf = gpd.read_file(file_path, driver="KML")
-                else:
-                    gdf = gpd.read_file(file_path)
-                lon, lat = leafmap.gdf_centroid(gdf)
-                column_names = gdf.select_dtypes(include='number').columns.values.tolist()
-                selected_variable = None
-
-                with container:
-                    random_color = st.checkbox("Apply Symbology", False)
-                    if random_color:
-                        selected_variable = st.selectbox(
-                                "Select a column to apply colors", column_names
-                            )
-                        # selected_variable = st.sidebar.selectbox("Select Variable for Legend", column_names)
-                        # min_value = gdf[selected_variable].min()
-                        # max_value = gdf[selected_variable].max()
-
-                # m = leafmap.Map(center=(40, -100))
-                m = leafmap.Map(center=(lat, lon))
-                folium.TileLayer("Stamen Terrain", show=False).add_to(m)               
-                m.add_basemap(basemaps[selected_basemap])
-                m.add_gdf(gdf, layer_name=layer_name)
-                m.zoom_to_gdf(gdf)
-                if random_color == True and selected_variable != None:
-                    gdf.explore(
-                    m = m,
-                    column=selected_variable,  # make column
-                    scheme="naturalbreaks",  # use mapclassify's natural breaks scheme
-                    legend=True,  # show legend
-                    k=5,  # use 10 bins
-                    tooltip=False,  # hide tooltip
-                    popup=[selected_variable],  # show popup (on-click)
-                    legend_kwds=dict(colorbar=False),  # do not use colorbar
-                    )
-                #     m.add_legend(title=selected_variable, labels=[min_value, max_value])
-                m.to_streamlit(width=width, height=height)
-
-        else:
-            with row1_col1:
-                m = leafmap.Map()
-                folium.TileLayer("Stamen Terrain", show=False).add_to(m)
-                # folium.TileLayer("Stamen Watercolor", show=False).add_to(m)
-                m.add_basemap(basemaps[selected_basemap])
-                m.to_streamlit(width=width, height=height)
-
-        probe = st.file_uploader(
-            "Upload INRIX dataset", type=["zip"])
-        
-        col1, col2 = st.columns(2)
-        with col1:
-            if st.button("Process INRIX"):
-                if probe is not None:
-                    st.write(probe)
-
-        with col2:
-            if st.button("Export GPKG"):
-                if probe is not None:
-                    st.write(probe)
+import os
+import streamlit as st
+
+# geopandas, folium and leafmap are imported lazily inside the functions
+# that need them: the multi-page launcher imports this module just to
+# register the app, and loading shapely/pyproj/GDAL up front costs hundreds
+# of milliseconds of startup time even when this page is never opened.
+
+def save_uploaded_file(file_content, file_name):
+    """
+    Save the uploaded file to a temporary directory. The file name is keyed
+    by a hash of the content, so re-uploads of the same bytes (and every
+    Streamlit rerun) reuse the existing temp file instead of rewriting it,
+    and downstream caches keyed on the path stay warm.
+    """
+    import hashlib
+    import tempfile
+    import os
+
+    _, file_extension = os.path.splitext(file_name)
+    file_buffer = file_content.getbuffer()
+    file_id = hashlib.blake2b(file_buffer, digest_size=16).hexdigest()
+    file_path = os.path.join(tempfile.gettempdir(), f"{file_id}{file_extension}")
+
+    if (os.path.exists(file_path)
+            and os.path.getsize(file_path) == len(file_buffer)):
+        return file_path
+
+    with open(file_path, "wb") as file:
+        file.write(file_buffer)
+
+    return file_path
+
+
+@st.cache_data(show_spinner=False)
+def load_vector_file(file_path, is_kml=False, bbox=None):
+    """
+    Parse a vector file into a GeoDataFrame, cached on the file path.
+    Every widget interaction reruns the whole script, so without the cache
+    each basemap toggle or symbology change re-parsed the same file.
+    pyogrio reads the file in bulk through GDAL's C API; the default Fiona
+    engine decodes one feature at a time in Python.
+    When `bbox` is given, the spatial filter runs inside GDAL at read time,
+    so formats with a spatial index (GPKG, FlatGeobuf) only touch the
+    features that intersect it.
+    """
+    import geopandas as gpd
+
+    # Zipped bundles (e.g. shapefiles) are read in place through GDAL's
+    # /vsizip/ virtual filesystem, so nothing gets extracted and the .shx
+    # index inside the archive is used directly
+    if file_path.lower().endswith(".zip") and os.path.exists(file_path):
+        file_path = f"/vsizip/{file_path}"
+
+    if is_kml:
+        try:
+            return gpd.read_file(file_path, driver="KML",
+                                 engine="pyogrio", use_arrow=True, bbox=bbox)
+        except Exception:
+            # Some GDAL builds don't expose the KML driver through
+            # pyogrio; fall back to the Fiona path
+            gpd.io.file.fiona.drvsupport.supported_drivers["KML"] = "rw"
+            return gpd.read_file(file_path, driver="KML", engine="fiona",
+                                 bbox=bbox)
+    return gpd.read_file(file_path, engine="pyogrio", use_arrow=True,
+                         bbox=bbox)
+
+
+@st.cache_data(show_spinner=False)
+def get_vector_metadata(file_path, is_kml=False, bbox=None):
+    """
+    Centroid and numeric column names for a vector file, cached alongside
+    the parsed GeoDataFrame so reruns skip the centroid math as well.
+    """
+    import leafmap.foliumap as leafmap
+    import numpy as np
+
+    gdf = load_vector_file(file_path, is_kml, bbox)
+    lon, lat = leafmap.gdf_centroid(gdf)
+    # select_dtypes builds a whole column-subset frame just to read its
+    # labels; checking the dtype kinds directly touches no data
+    kinds = np.array([dt.kind for dt in gdf.dtypes.values])
+    column_names = gdf.columns[np.isin(kinds, list("iuf"))].tolist()
+    return lon, lat, column_names
+
+
+def app():
+
+    st.title("INRIX Reliability Score Generator")
+
+    row1_col1, row1_col2 = st.columns([2, 1])
+    width = 880
+    height = 600
+
+    with row1_col2:
+
+        import leafmap.foliumap as leafmap
+        
+        basemaps = {
+        "Roadmap": "ROADMAP",
+        "Terrain": "TERRAIN",
+        "Satellite": "SATELLITE",
+        "Hybrid": "HYBRID",
+        }
+
+        selected_basemap = st.sidebar.radio("Select Basemap", list(basemaps.keys()))
+
+        clip_to_view = st.sidebar.checkbox(
+            "Clip data to last map view", False,
+            help="Read only the features that intersect the most recent map "
+                 "extent. Fast for spatially indexed formats such as GPKG "
+                 "or FlatGeobuf.")
+
+        st.markdown(
+            """<style>
+        div[class*="stRadio"] > label > div[data-testid="stMarkdownContainer"] > p {
+            font-size: 24px;
+            # font-weight: bold;
+        }
+            </style>
+            """, unsafe_allow_html=True)
+
+        url = st.text_input(
+            "Enter a URL to a vector dataset",
+
+        )
+
+        data = st.file_uploader(
+            "Upload a vector dataset",
+            type=["geojson", "kml", "zip", "tab", "gpkg", "fgb"],
+            help="For large datasets, prefer .fgb or .gpkg over .geojson: "
+                 "both carry a spatial index and read many times faster.",
+        )
+
+        container = st.container()
+
+        if data or url:
+            if data:
+                file_path = save_uploaded_file(data, data.name)
+                layer_name = os.path.splitext(data.name)[0]
+            elif url:
+                file_path = url
+                layer_name = url.split("/")[-1].split(".")[0]
+
+            with row1_col1:
+                is_kml = file_path.lower().endswith(".kml")
+                view_bbox = (st.session_state.get("last_view_bounds")
+                             if clip_to_view else None)
+                gdf = load_vector_file(file_path, is_kml, view_bbox)
+                if view_bbox is not None and len(gdf) == 0:
+                    st.warning("No features intersect the last map view; "
+                               "showing the full dataset instead.")
+                    view_bbox = None
+                    gdf = load_vector_file(file_path, is_kml)
+                lon, lat, column_names = get_vector_metadata(file_path,
+                                                             is_kml,
+                                                             view_bbox)
+                selected_variable = None
+
+                with container:
+                    random_color = st.checkbox("Apply Symbology", False)
+                    if random_color:
+                        selected_variable = st.selectbox(
+                                "Select a column to apply colors", column_names
+                            )
+                        # selected_variable = st.sidebar.selectbox("Select Variable for Legend", column_names)
+                        # min_value = gdf[selected_variable].min()
+                        # max_value = gdf[selected_variable].max()
+
+                import folium
+                import shapely
+
+                # Folium writes every vertex of every geometry into the page
+                # HTML, so the rendered copy is simplified to roughly screen
+                # resolution and its coordinates quantized. The full-precision
+                # frame is kept for the attribute math.
+                minx, miny, maxx, maxy = gdf.total_bounds
+                simplify_tol = max(maxx - minx, maxy - miny) / 4000
+                if simplify_tol > 0:
+                    render_gdf = gdf.assign(
+                        geometry=shapely.set_precision(
+                            gdf.geometry.simplify(simplify_tol,
+                                                  preserve_topology=True)
+                               .values,
+                            1e-5))
+                else:
+                    render_gdf = gdf
+
+                # m = leafmap.Map(center=(40, -100))
+                m = leafmap.Map(center=(lat, lon))
+                m.add_basemap(basemaps[selected_basemap])
+                # Folium embeds every attribute of every feature in the
+                # popup HTML, so only the geometry and the column being
+                # displayed ride along into the page
+                display_cols = [render_gdf.geometry.name]
+                if selected_variable is not None:
+                    display_cols.insert(0, selected_variable)
+                m.add_gdf(render_gdf[display_cols], layer_name=layer_name)
+                m.zoom_to_gdf(render_gdf)
+                if random_color == True and selected_variable != None:
+                    import mapclassify
+                    import numpy as np
+
+                    # Same natural-breaks scheme gdf.explore would use, but
+                    # the color assignment is one vectorized searchsorted +
+                    # array gather instead of per-feature Python styling,
+                    # and a single folium.GeoJson layer carries the result
+                    values = gdf[selected_variable].to_numpy(dtype='float64')
+                    bins = mapclassify.NaturalBreaks(values, k=5).bins
+                    palette = np.array(['#ffffb2', '#fecc5c', '#fd8d3c',
+                                        '#f03b20', '#bd0026'])
+                    color_idx = np.clip(np.searchsorted(bins, values),
+                                        0, len(palette) - 1)
+                    styled_gdf = render_gdf[[selected_variable,
+                                             render_gdf.geometry.name]].copy()
+                    styled_gdf["_fill_color"] = palette[color_idx]
+
+                    folium.GeoJson(
+                        styled_gdf,
+                        style_function=lambda feature: {
+                            "fillColor": feature["properties"]["_fill_color"],
+                            "color": feature["properties"]["_fill_color"],
+                            "weight": 0.3,
+                            "fillOpacity": 0.7,
+                        },
+                        popup=folium.GeoJsonPopup(fields=[selected_variable]),
+                    ).add_to(m)
+                #     m.add_legend(title=selected_variable, labels=[min_value, max_value])
+                if clip_to_view:
+                    # Bidirectional rendering returns the live Leaflet state;
+                    # its bounds seed the clipped read on the next rerun
+                    map_state = m.to_streamlit(width=width, height=height,
+                                               bidirectional=True)
+                    map_bounds = (map_state or {}).get("bounds")
+                    if map_bounds:
+                        st.session_state["last_view_bounds"] = (
+                            map_bounds["_southWest"]["lng"],
+                            map_bounds["_southWest"]["lat"],
+                            map_bounds["_northEast"]["lng"],
+                            map_bounds["_northEast"]["lat"])
+                else:
+                    m.to_streamlit(width=width, height=height)
+
+        else:
+            with row1_col1:
+                m = leafmap.Map()
+                m.add_basemap(basemaps[selected_basemap])
+                m.to_streamlit(width=width, height=height)
+
+        probe = st.file_uploader(
+            "Upload INRIX dataset", type=["zip"])
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            if st.button("Process INRIX"):
+                if probe is not None:
+                    st.write(probe)
+
+        with col2:
+            if st.button("Export GPKG"):
+                if probe is not None:
+                    st.write(probe)